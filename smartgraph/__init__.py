@@ -1,6 +1,9 @@
 # smartgraph/__init__.py
 
-# Import all components
+from typing import TYPE_CHECKING
+
+# Import all components; toolkits are exposed lazily through __getattr__ below
+from . import tools
 from .components import *
 from .core import Pipeline, ReactiveComponent, ReactiveSmartGraph
 from .exceptions import (
@@ -13,12 +16,11 @@ from .exceptions import (
 )
 from .graph_visualizer import GraphVisualizer
 from .logging import SmartGraphLogger
-
-# Import all toolkits
-from .tools import *
-from .tools.memory_toolkit import MemoryToolkit
 from .utils import process_observable
 
+if TYPE_CHECKING:
+    from .tools import DuckDuckGoToolkit, MemoryToolkit, TavilyToolkit
+
 # List of core classes
 __core_classes__ = [
     "ReactiveComponent",
@@ -68,3 +70,11 @@ __all__ = __core_classes__ + [
 ]
 
 __version__ = "0.2.0"
+
+
+def __getattr__(name: str):
+    # Toolkits are resolved lazily through smartgraph.tools to keep their backends off the
+    # import path until they are used.
+    if name in tools.__all__:
+        return getattr(tools, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
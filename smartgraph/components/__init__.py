@@ -1,6 +1,6 @@
 # smartgraph/components/__init__.py
 from .branching_component import BranchingComponent
-from .completion_component import CompletionComponent
+from .completion_component import BatchHandle, CompletionComponent
 from .input_handlers import (
     BaseInputHandler,
     CommandLineInputHandler,
@@ -49,4 +49,5 @@ __all__ = [
     "ParquetInputHandler",
     "StructuredDataDetector",
     "CompletionComponent",
+    "BatchHandle",
 ]
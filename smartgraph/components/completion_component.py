@@ -1,18 +1,85 @@
 # smartgraph/components/completion_component.py
 
 import asyncio
-import json
-from typing import Any, AsyncGenerator, Dict, List, Optional, Union
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from http import HTTPStatus
+from types import MappingProxyType
+from typing import Any, AsyncGenerator, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
 import litellm
+import orjson
 from litellm.utils import trim_messages
 
 from ..core import ReactiveComponent
+from ..exceptions import ConfigurationError, ExecutionError
 from ..logging import SmartGraphLogger
+from ..rate_limit import AsyncTokenBucket, limiter_for_model
+from ..semantic_cache import SemanticCache
 from ..tools.base_toolkit import Toolkit
 
 logger = SmartGraphLogger.get_logger()
 
+_TOOL_RESULT_CACHE_SIZE = 256
+
+# Providers whose batch endpoints LiteLLM exposes through acreate_batch
+_BATCH_PROVIDERS = ("openai", "azure")
+# Completion kwargs that configure the client rather than the request body
+_CLIENT_KWARGS = ("api_key", "api_base", "api_version")
+_BATCH_TERMINAL_FAILURES = ("failed", "expired", "cancelled")
+
+_SUMMARY_PROMPT = (
+    "Summarize the following conversation between a user and an assistant. Keep facts, "
+    "decisions and open questions that later turns may rely on. Reply with the summary only."
+)
+
+
+@dataclass
+class BatchHandle:
+    """Reference to inputs submitted through CompletionComponent.submit_batch."""
+
+    size: int
+    batch_id: Optional[str] = None
+    custom_llm_provider: Optional[str] = None
+    task: Optional["asyncio.Task[List[Dict[str, Any]]]"] = None
+
+
+def _supports_prompt_caching(model: str) -> bool:
+    # Anthropic models (direct or through Bedrock/Vertex) honour cache_control breakpoints
+    return "claude" in model.lower()
+
+
+def _response_text(response: Any) -> str:
+    # Concatenate the text parts of the message items in a Responses API result
+    text = getattr(response, "output_text", None)
+    if text:
+        return text
+    parts = []
+    for item in response.output:
+        if _field(item, "type") != "message":
+            continue
+        for part in _field(item, "content") or []:
+            if _field(part, "type") == "output_text":
+                parts.append(_field(part, "text"))
+    return "".join(parts)
+
+
+def _batch_record_result(record: Dict[str, Any]) -> Dict[str, Any]:
+    # One line of a Batch API output or error file
+    response = record.get("response") or {}
+    if record.get("error") or response.get("status_code") != HTTPStatus.OK:
+        error = record.get("error") or (response.get("body") or {}).get("error")
+        return {"error": str(error)}
+    return {"ai_response": response["body"]["choices"][0]["message"]["content"]}
+
+
+def _field(obj: Any, name: str) -> Any:
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
 
 class CompletionComponent(ReactiveComponent):
     def __init__(
@@ -23,16 +90,55 @@ class CompletionComponent(ReactiveComponent):
         max_tokens: Optional[int] = None,
         toolkits: Optional[List[Toolkit]] = None,
         stream: bool = False,
+        response_cache: Optional[SemanticCache] = None,
+        rate_limiter: Optional[AsyncTokenBucket] = None,
+        stateful: bool = False,
+        max_history_turns: Optional[int] = None,
+        summary_model: Optional[str] = None,
         **kwargs,
     ):
         super().__init__(name)
+        if stateful:
+            if getattr(litellm, "aresponses", None) is None:
+                raise ConfigurationError(
+                    "stateful mode requires a LiteLLM version with the Responses API", name
+                )
+            if stream or toolkits:
+                raise ConfigurationError(
+                    "stateful mode does not support streaming or toolkits", name
+                )
         self.model = model
         self.system_context = system_context
         self.max_tokens = max_tokens or 5000
         self.kwargs = kwargs
         self.conversation_history = [{"role": "system", "content": self.system_context}]
-        self.toolkits = toolkits or []
         self.stream = stream
+        self.response_cache = response_cache
+        # In stateful mode the provider keeps the conversation: only the new user turn is
+        # sent, chained through the previous response id. conversation_history is still
+        # recorded locally but never resent.
+        self.stateful = stateful
+        self._prev_response_id: Optional[str] = None
+        # History is unbounded by default. Pass max_history_turns (e.g. 20) to keep only the
+        # latest user/assistant exchanges; with a summary_model, older turns are folded into a
+        # summary message after the system prompt instead of being dropped.
+        self.max_history_turns = max_history_turns
+        self.summary_model = summary_model
+        self._has_summary = False
+        # Falls back to the limiter shared by all components of this model, if one is configured
+        self.rate_limiter = rate_limiter or limiter_for_model(model)
+        self.toolkits: List[Toolkit] = []
+        # Tool schemas and the name -> function table are merged once per toolkit rather
+        # than rebuilt from every toolkit on each LLM call.
+        self._tools_schema: List[Dict[str, Any]] = []
+        self._fn_table: Dict[str, Callable[..., Any]] = {}
+        self._fn_view: Mapping[str, Callable[..., Any]] = MappingProxyType(self._fn_table)
+        self._tool_cache_ttl: Dict[str, float] = {}
+        self._tool_results: "OrderedDict[Tuple[str, bytes], Tuple[float, Any]]" = OrderedDict()
+        self._call_kwargs: Dict[str, Any] = {}
+        self._refresh_call_kwargs()
+        for toolkit in toolkits or []:
+            self.add_toolkit(toolkit)
 
     async def process(
         self, input_data: dict
@@ -43,51 +149,259 @@ class CompletionComponent(ReactiveComponent):
             if not content:
                 raise ValueError("Input data must contain either a 'content' or 'message' key")
 
-            self.conversation_history.append({"role": "user", "content": content})
+            await self._compact_history()
             messages = self._prepare_messages(content)
-            trimmed_messages = trim_messages(messages, self.model, self.max_tokens)
-
+            user_turn = messages[-1]
             if self.stream:
+                self.conversation_history.append(user_turn)
+                trimmed_messages = trim_messages(messages, self.model, self.max_tokens)
                 return self._stream_llm_call(trimmed_messages)
+            if self.stateful:
+                result = await self._stateful_completion(content)
+            elif self.response_cache is not None:
+                result = await self._cached_completion(content, messages)
             else:
-                response = await self._llm_call(trimmed_messages)
-                result = await self._handle_llm_response(response.choices[0].message, messages)
-                self.conversation_history.append(
-                    {"role": "assistant", "content": result["ai_response"]}
-                )
-                return result
+                result = await self._completion(messages)
+            # Both turns are recorded together once the call succeeds, so overlapping calls
+            # keep their question and answer adjacent and a failed call leaves no trace
+            self.conversation_history += (
+                user_turn,
+                {"role": "assistant", "content": result["ai_response"]},
+            )
+            return result
         except Exception as e:
             logger.error(f"Error in CompletionComponent: {str(e)}", exc_info=True)
             return {"error": str(e)}
 
-    async def _llm_call(self, messages: List[Dict[str, str]]) -> Any:
-        tools = [schema for toolkit in self.toolkits for schema in toolkit.schemas]
+    async def process_many(
+        self, inputs: List[Dict[str, Any]], max_concurrency: int = 8
+    ) -> List[Dict[str, Any]]:
+        """Complete several independent inputs concurrently.
+
+        Each input is answered against a snapshot of the current conversation history and
+        the history itself is left untouched, so this suits stateless fan-out such as
+        evaluations. Results are returned in input order; a failing input yields
+        ``{"error": ...}`` in its slot without affecting the others. Streaming is not used.
+
+        Args:
+            inputs (List[Dict[str, Any]]): Inputs with a 'content' or 'message' key.
+            max_concurrency (int): Maximum number of in-flight LLM requests.
+
+        Returns:
+            List[Dict[str, Any]]: One result per input.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        history = list(self.conversation_history)
+
+        async def complete(input_data: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                content = input_data.get("content") or input_data.get("message")
+                if not content:
+                    raise ValueError("Input data must contain either a 'content' or 'message' key")
+                messages = [*history, {"role": "user", "content": content}]
+                async with semaphore:
+                    return await self._completion(messages)
+            except Exception as e:
+                logger.error(f"Error in CompletionComponent: {str(e)}", exc_info=True)
+                return {"error": str(e)}
+
+        return list(await asyncio.gather(*(complete(input_data) for input_data in inputs)))
+
+    async def submit_batch(
+        self, inputs: List[Dict[str, Any]], max_concurrency: int = 8
+    ) -> BatchHandle:
+        """Submit independent inputs for offline completion.
+
+        Uses the provider's Batch API when LiteLLM supports it for this model and no
+        toolkits are attached (tool calls need a follow-up request a batch cannot make).
+        Otherwise the inputs are completed in the background with process_many. Like
+        process_many, every input is answered against a snapshot of the conversation
+        history, which is left untouched.
+
+        Args:
+            inputs (List[Dict[str, Any]]): Inputs with a 'content' or 'message' key.
+            max_concurrency (int): Concurrency used by the process_many fallback.
+
+        Returns:
+            BatchHandle: Handle to pass to await_batch.
+        """
+        target = self._batch_target()
+        if target is None:
+            task = asyncio.ensure_future(self.process_many(inputs, max_concurrency))
+            return BatchHandle(size=len(inputs), task=task)
+        model, provider = target
+
+        client_kwargs = {k: v for k, v in self.kwargs.items() if k in _CLIENT_KWARGS}
+        body_kwargs = {k: v for k, v in self.kwargs.items() if k not in _CLIENT_KWARGS}
+        history = list(self.conversation_history)
+        lines = []
+        for index, input_data in enumerate(inputs):
+            content = input_data.get("content") or input_data.get("message")
+            if not content:
+                raise ValueError("Input data must contain either a 'content' or 'message' key")
+            messages = trim_messages(
+                [*history, {"role": "user", "content": content}], self.model, self.max_tokens
+            )
+            request = {
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": model, "messages": messages, **body_kwargs},
+            }
+            lines.append(orjson.dumps(request))
+
+        batch_file = await litellm.acreate_file(
+            file=("batch.jsonl", b"\n".join(lines)),
+            purpose="batch",
+            custom_llm_provider=provider,
+            **client_kwargs,
+        )
+        batch = await litellm.acreate_batch(
+            completion_window="24h",
+            endpoint="/v1/chat/completions",
+            input_file_id=batch_file.id,
+            custom_llm_provider=provider,
+            **client_kwargs,
+        )
+        logger.info(f"CompletionComponent {self.name} submitted batch {batch.id}")
+        return BatchHandle(size=len(inputs), batch_id=batch.id, custom_llm_provider=provider)
+
+    async def await_batch(
+        self,
+        handle: BatchHandle,
+        poll_interval: float = 30.0,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Wait for a batch submitted with submit_batch and return its results in input order.
+
+        Args:
+            handle (BatchHandle): Handle returned by submit_batch.
+            poll_interval (float): Seconds between Batch API status checks.
+            on_progress (Optional[Callable[[int, int], None]]): Called with the number of
+                finished requests and the batch size after each status check.
+
+        Returns:
+            List[Dict[str, Any]]: One {"ai_response": ...} or {"error": ...} per input.
 
-        completion_params = {
+        Raises:
+            ExecutionError: If the provider reports the batch as failed, expired or cancelled.
+        """
+        if handle.task is not None:
+            results = await handle.task
+            if on_progress:
+                on_progress(handle.size, handle.size)
+            return results
+
+        client_kwargs = {k: v for k, v in self.kwargs.items() if k in _CLIENT_KWARGS}
+        batch = await self._poll_batch(handle, poll_interval, on_progress, client_kwargs)
+        results: List[Dict[str, Any]] = [
+            {"error": "No result returned for this input"} for _ in range(handle.size)
+        ]
+        # Requests that failed are written to a separate error file, in the same format
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if file_id:
+                await self._read_batch_results(handle, file_id, results, client_kwargs)
+        return results
+
+    async def _poll_batch(
+        self,
+        handle: BatchHandle,
+        poll_interval: float,
+        on_progress: Optional[Callable[[int, int], None]],
+        client_kwargs: Dict[str, Any],
+    ) -> Any:
+        while True:
+            batch = await litellm.aretrieve_batch(
+                batch_id=handle.batch_id,
+                custom_llm_provider=handle.custom_llm_provider,
+                **client_kwargs,
+            )
+            if on_progress and batch.request_counts is not None:
+                counts = batch.request_counts
+                on_progress(counts.completed + counts.failed, handle.size)
+            if batch.status == "completed":
+                return batch
+            if batch.status in _BATCH_TERMINAL_FAILURES:
+                raise ExecutionError(f"Batch {handle.batch_id} {batch.status}", self.name)
+            await asyncio.sleep(poll_interval)
+
+    async def _read_batch_results(
+        self,
+        handle: BatchHandle,
+        file_id: str,
+        results: List[Dict[str, Any]],
+        client_kwargs: Dict[str, Any],
+    ) -> None:
+        content = await litellm.afile_content(
+            file_id=file_id, custom_llm_provider=handle.custom_llm_provider, **client_kwargs
+        )
+        for line in content.text.splitlines():
+            if line:
+                record = orjson.loads(line)
+                results[int(record["custom_id"])] = _batch_record_result(record)
+
+    def _batch_target(self) -> Optional[Tuple[str, str]]:
+        # Returns the provider-local model name and provider when the Batch API can be used
+        if self._fn_table:
+            return None
+        try:
+            model, provider, _, _ = litellm.get_llm_provider(self.model)
+        except Exception:
+            return None
+        return (model, provider) if provider in _BATCH_PROVIDERS else None
+
+    async def _completion(self, messages: List[Dict[str, str]]) -> Dict[str, str]:
+        trimmed_messages = trim_messages(messages, self.model, self.max_tokens)
+        response = await self._llm_call(trimmed_messages)
+        return await self._handle_llm_response(response.choices[0].message, messages)
+
+    async def _stateful_completion(self, content: str) -> Dict[str, str]:
+        params = {
             "model": self.model,
-            "messages": messages,
-            "tools": tools if tools else None,
-            "tool_choice": "auto" if tools else None,
+            "input": [{"role": "user", "content": content}],
+            "previous_response_id": self._prev_response_id,
+            # Instructions are not carried over from the previous response
+            "instructions": self.system_context or None,
             **self.kwargs,
         }
+        async with self.rate_limiter or nullcontext():
+            response = await litellm.aresponses(**params)
+        self._prev_response_id = response.id
+        return {"ai_response": _response_text(response)}
+
+    async def _cached_completion(
+        self, content: str, messages: List[Dict[str, str]]
+    ) -> Dict[str, str]:
+        # Responses are only reused after the same preceding messages (system prompt included)
+        # and with the same tool set, so a follow-up is never answered out of context
+        history = orjson.dumps(messages[:-1], option=orjson.OPT_SORT_KEYS)
+        scope = (hashlib.blake2b(history, digest_size=16).digest(), tuple(self._fn_table))
+        vector = await self.response_cache.embed(content)
+        cached = self.response_cache.lookup(scope, vector)
+        if cached is not None:
+            logger.debug(f"CompletionComponent {self.name} served response from cache")
+            return {"ai_response": cached}
+        result = await self._completion(messages)
+        self.response_cache.store(scope, vector, result["ai_response"])
+        return result
+
+    async def _llm_call(self, messages: List[Dict[str, str]]) -> Any:
+        self._apply_prompt_cache(messages)
+        # A fresh dict per call: concurrent requests must not share the messages slot
+        completion_params = {**self._call_kwargs, "messages": messages}
 
-        return await litellm.acompletion(**completion_params)
+        async with self.rate_limiter or nullcontext():
+            return await litellm.acompletion(**completion_params)
 
     async def _stream_llm_call(
         self, messages: List[Dict[str, str]]
     ) -> AsyncGenerator[Dict[str, Any], None]:
-        tools = [schema for toolkit in self.toolkits for schema in toolkit.schemas]
+        self._apply_prompt_cache(messages)
+        completion_params = {**self._call_kwargs, "messages": messages, "stream": True}
 
-        completion_params = {
-            "model": self.model,
-            "messages": messages,
-            "tools": tools if tools else None,
-            "tool_choice": "auto" if tools else None,
-            "stream": True,
-            **self.kwargs,
-        }
-
-        async for chunk in await litellm.acompletion(**completion_params):
+        async with self.rate_limiter or nullcontext():
+            response = await litellm.acompletion(**completion_params)
+        async for chunk in response:
             yield chunk
 
     async def _handle_llm_response(
@@ -95,18 +409,30 @@ class CompletionComponent(ReactiveComponent):
     ) -> Dict[str, str]:
         if message.get("tool_calls"):
             tool_calls = message["tool_calls"]
-            messages.append({"role": "assistant", "content": None, "tool_calls": tool_calls})
+            # Tool exchanges are sent to the LLM but not kept in the conversation history
+            messages = [
+                *messages,
+                {"role": "assistant", "content": None, "tool_calls": tool_calls},
+            ]
 
-            for tool_call in tool_calls:
-                function_name = tool_call["function"]["name"]
-                function_args = json.loads(tool_call["function"]["arguments"])
-                tool_response = await self._execute_tool(function_name, function_args)
+            # Independent tool calls are started together and awaited as a group; a failing
+            # tool still propagates its exception as it did when the calls ran one by one.
+            tool_responses = await asyncio.gather(
+                *(
+                    self._execute_tool(
+                        tool_call["function"]["name"],
+                        orjson.loads(tool_call["function"]["arguments"]),
+                    )
+                    for tool_call in tool_calls
+                )
+            )
+            for tool_call, tool_response in zip(tool_calls, tool_responses, strict=True):
                 messages.append(
                     {
                         "role": "tool",
                         "tool_call_id": tool_call["id"],
-                        "name": function_name,
-                        "content": json.dumps(tool_response),
+                        "name": tool_call["function"]["name"],
+                        "content": orjson.dumps(tool_response).decode(),
                     }
                 )
 
@@ -116,19 +442,90 @@ class CompletionComponent(ReactiveComponent):
             return {"ai_response": message["content"]}
 
     async def _execute_tool(self, function_name: str, function_args: Dict[str, Any]) -> Any:
-        for toolkit in self.toolkits:
-            if function_name in toolkit.functions:
-                return await toolkit.functions[function_name](**function_args)
-        raise ValueError(f"Tool {function_name} not found in any toolkit")
+        # Names are interned on registration, so interning the incoming name lets the table
+        # lookup match on identity instead of comparing strings
+        function_name = sys.intern(function_name)
+        function = self._fn_table.get(function_name)
+        if function is None:
+            raise ValueError(f"Tool {function_name} not found in any toolkit")
+        ttl = self._tool_cache_ttl.get(function_name)
+        if ttl is None:
+            return await function(**function_args)
+
+        key = (function_name, orjson.dumps(function_args, option=orjson.OPT_SORT_KEYS, default=str))
+        now = time.monotonic()
+        cached = self._tool_results.get(key)
+        if cached is not None and cached[0] > now:
+            self._tool_results.move_to_end(key)
+            return cached[1]
+        result = await function(**function_args)
+        self._tool_results[key] = (now + ttl, result)
+        self._tool_results.move_to_end(key)
+        if len(self._tool_results) > _TOOL_RESULT_CACHE_SIZE:
+            self._tool_results.popitem(last=False)
+        return result
+
+    async def _compact_history(self) -> None:
+        if self.max_history_turns is None or self.stateful:
+            return
+        start = 2 if self._has_summary else 1
+        keep = 2 * self.max_history_turns
+        turns = self.conversation_history[start:]
+        if len(turns) <= keep:
+            return
+        dropped, recent = turns[: len(turns) - keep], turns[len(turns) - keep :]
+        head: List[Dict[str, str]] = []
+        if self.summary_model is not None:
+            # The previous summary is folded into the new one so older context is not lost
+            summary = await self._summarize(self.conversation_history[1:start] + dropped)
+            if summary:
+                head.append(
+                    {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+                )
+        self.conversation_history[1:] = head + recent
+        self._has_summary = bool(head)
+
+    async def _summarize(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        try:
+            response = await litellm.acompletion(
+                model=self.summary_model,
+                messages=[
+                    {"role": "system", "content": _SUMMARY_PROMPT},
+                    {"role": "user", "content": transcript},
+                ],
+            )
+        except Exception as e:
+            logger.warning(f"History summarization failed, dropping older turns: {str(e)}")
+            return None
+        return response.choices[0].message["content"]
+
+    def _apply_prompt_cache(self, messages: List[Dict[str, Any]]) -> None:
+        """Mark the system prompt as a prompt-cache breakpoint for providers that support it.
+
+        The system message is rewritten in place, so callers must pass a copy of the
+        conversation history (trim_messages and the tool-call path both do). Tools precede
+        the system prompt in the cached prefix, so the stable tool schemas are cached too.
+        """
+        if not messages or not _supports_prompt_caching(self.model):
+            return
+        role, content = messages[0]["role"], messages[0]["content"]
+        if role == "system" and isinstance(content, str) and content:
+            messages[0] = {
+                "role": "system",
+                "content": [
+                    {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}
+                ],
+            }
 
     def _prepare_messages(self, new_content: str) -> List[Dict[str, str]]:
-        messages = [{"role": "system", "content": self.system_context}]
-        messages.extend(
-            self.conversation_history[1:]
-        )  # Skip the system message in conversation_history
-        if new_content:
-            messages.append({"role": "user", "content": new_content})
-        return messages
+        # conversation_history already starts with the system message and is kept in sync by
+        # set_system_context/clear_conversation_history. Each request gets its own shallow
+        # list rather than appending to the history in place: overlapping process() calls
+        # would otherwise see each other's pending user turns, and a failed call could not
+        # roll back its turn safely. The copy is cheap next to trim_messages, which deep-copies
+        # every message before each call anyway.
+        return [*self.conversation_history, {"role": "user", "content": new_content}]
 
     def set_system_context(self, context: str):
         self.system_context = context
@@ -136,6 +533,8 @@ class CompletionComponent(ReactiveComponent):
 
     def clear_conversation_history(self):
         self.conversation_history = [{"role": "system", "content": self.system_context}]
+        self._prev_response_id = None
+        self._has_summary = False
 
     def set_max_tokens(self, max_tokens: int):
         self.max_tokens = max_tokens
@@ -143,5 +542,32 @@ class CompletionComponent(ReactiveComponent):
     def get_conversation_history(self) -> List[Dict[str, str]]:
         return self.conversation_history
 
+    @property
+    def tool_functions(self) -> Mapping[str, Callable[..., Any]]:
+        """Read-only view of the registered tool functions, keyed by tool name."""
+        return self._fn_view
+
     def add_toolkit(self, toolkit: Toolkit):
+        if self.stateful:
+            raise ConfigurationError("stateful mode does not support toolkits", self.name)
         self.toolkits.append(toolkit)
+        self._tools_schema.extend(toolkit.schemas)
+        for function_name, function in toolkit.functions.items():
+            name = sys.intern(function_name)
+            # Earlier toolkits take precedence when function names collide
+            if name not in self._fn_table:
+                self._fn_table[name] = function
+                if toolkit.cache_ttl is not None:
+                    self._tool_cache_ttl[name] = toolkit.cache_ttl
+        self._refresh_call_kwargs()
+
+    def _refresh_call_kwargs(self):
+        # The request parameters other than the messages only change when a toolkit is added,
+        # so they are assembled once here rather than on every LLM call.
+        tools = self._tools_schema
+        self._call_kwargs = {
+            "model": self.model,
+            "tools": tools if tools else None,
+            "tool_choice": "auto" if tools else None,
+            **self.kwargs,
+        }
@@ -1,27 +1,108 @@
+import asyncio
 import csv
-import json
-import xml.etree.ElementTree as ET
+import re
+from collections import OrderedDict
 from io import BytesIO, StringIO
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
 
-import pandas as pd
+import orjson
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import pyarrow.parquet as pq
 import yaml
+from lxml import etree
 from reactivex import Observable, Subject
 
 from ..core import ReactiveComponent
 from ..logging import SmartGraphLogger
 
+try:
+    from yaml import CSafeLoader as _YAMLLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YAMLLoader
+
 logger = SmartGraphLogger.get_logger()
 
+# Only internal entities are expanded (no XXE; huge_tree=False bounds billion-laughs) and, like
+# xml.etree, comments and processing instructions are dropped so only elements reach the dict
+# conversion.
+_XML_PARSE_OPTIONS = dict(
+    resolve_entities="internal", huge_tree=False, remove_comments=True, remove_pis=True
+)
+_XML_PARSER = etree.XMLParser(**_XML_PARSE_OPTIONS)
+# str input is encoded to UTF-8 before parsing, so its encoding declaration no longer applies.
+_XML_TEXT_PARSER = etree.XMLParser(encoding="utf-8", **_XML_PARSE_OPTIONS)
+
+# Documents above this size are converted while parsing instead of from a full tree. Below it
+# building the tree is cheaper than the per-event overhead of iterparse.
+_XML_STREAMING_THRESHOLD = 64 * 1024
+
+# Inputs above this size are parsed on a worker thread. Arrow and lxml release the GIL while
+# parsing, so the event loop keeps serving other components; smaller inputs parse faster than
+# the thread handoff costs.
+_THREAD_OFFLOAD_THRESHOLD = 64 * 1024
+
+
+# Whitespace-separated tokens; a quoted section (quotes kept) ends its token, and an
+# unterminated quote runs to the end of the input
+_COMMAND_TOKEN_RE = re.compile(
+    r"""[^\s'"]*(?:"[^"]*"|'[^']*')|[^\s'"]*["'].*|[^\s'"]+""", re.DOTALL
+)
+_PARQUET_MAGIC = b"PAR1"
+# Formats recognised by their first and last non-whitespace characters
+_DELIMITED_FORMATS = {("{", "}"): "json", ("[", "]"): "json", ("<", ">"): "xml"}
+
+# "rows" yields a list of row dicts; "columnar" a dict of column lists, which avoids building
+# one dict per row
+_OUTPUT_LAYOUTS = ("rows", "columnar")
+
+# Structured-data handlers by format name, filled in by BaseInputHandler.__init_subclass__
+_STRUCTURED_HANDLERS: Dict[str, type] = {}
+
+
+async def _parse(size: int, parser: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    if size > _THREAD_OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(parser, *args, **kwargs)
+    return parser(*args, **kwargs)
+
+
+def _check_output_layout(output: str) -> str:
+    if output not in _OUTPUT_LAYOUTS:
+        raise ValueError(f"output must be one of {', '.join(_OUTPUT_LAYOUTS)}, got {output!r}")
+    return output
+
 
 class BaseInputHandler(ReactiveComponent):
+    def __init_subclass__(cls, structured_format: Optional[str] = None, **kwargs):
+        """Register subclasses declared with ``structured_format`` for StructuredDataDetector."""
+        super().__init_subclass__(**kwargs)
+        if structured_format is not None:
+            _STRUCTURED_HANDLERS[structured_format] = cls
+
+    def __init__(self, name: str, cache_size: int = 0):
+        super().__init__(name)
+        # Up to cache_size parsed str/bytes inputs are memoized by content (0 disables it).
+        # Hits return a shallow copy, so nested values are shared between calls.
+        self.cache_size = cache_size
+        self._results: "OrderedDict[Union[str, bytes], Dict[str, Any]]" = OrderedDict()
+
     async def process(self, input_data: Any) -> Dict[str, Any]:
+        cacheable = self.cache_size > 0 and isinstance(input_data, (str, bytes))
+        if cacheable:
+            cached = self._results.get(input_data)
+            if cached is not None:
+                self._results.move_to_end(input_data)
+                return dict(cached)
         try:
-            return await self._handle_input(input_data)
+            result = await self._handle_input(input_data)
         except Exception as e:
             logger.error(f"Error in {self.__class__.__name__}: {str(e)}")
             return {"type": self._get_type(), "error": str(e)}
+        if cacheable and "error" not in result:
+            self._results[input_data] = dict(result)
+            if len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return result
 
     async def _handle_input(self, input_data: Any) -> Dict[str, Any]:
         raise NotImplementedError("Subclasses must implement _handle_input method")
@@ -32,11 +113,13 @@ class BaseInputHandler(ReactiveComponent):
 
 class TextInputHandler(BaseInputHandler):
     async def _handle_input(self, input_data: str) -> Dict[str, Any]:
+        content = input_data.strip()
         return {
             "type": "text",
-            "content": input_data.strip(),
-            "length": len(input_data.strip()),
-            "word_count": len(input_data.split()),
+            "content": content,
+            "length": len(content),
+            # str.split() counts words in a single C pass; surrounding whitespace is ignored
+            "word_count": len(content.split()),
         }
 
 
@@ -44,12 +127,12 @@ class FileUploadHandler(BaseInputHandler):
     def __init__(self, name: str, allowed_extensions: Optional[List[str]] = None):
         super().__init__(name)
         self.allowed_extensions = allowed_extensions or []
+        # str.endswith takes a tuple of suffixes and checks them all in one C call
+        self._suffixes = tuple(self.allowed_extensions)
 
     async def _handle_input(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         filename = input_data.get("filename", "")
-        if self.allowed_extensions and not any(
-            filename.endswith(ext) for ext in self.allowed_extensions
-        ):
+        if self._suffixes and not filename.endswith(self._suffixes):
             raise ValueError(
                 f"Unsupported file type. Allowed types: {', '.join(self.allowed_extensions)}"
             )
@@ -105,35 +188,7 @@ class SpeechInputHandler(BaseInputHandler):
 
 class CommandLineInputHandler(BaseInputHandler):
     async def _handle_input(self, input_data: str) -> Dict[str, Any]:
-        parts = []
-        current_part = []
-        in_quotes = False
-        quote_char = None
-
-        for char in input_data:
-            if char in ["'", '"']:
-                if not in_quotes:
-                    in_quotes = True
-                    quote_char = char
-                    current_part.append(char)
-                elif char == quote_char:
-                    in_quotes = False
-                    quote_char = None
-                    current_part.append(char)
-                    parts.append("".join(current_part))
-                    current_part = []
-                else:
-                    current_part.append(char)
-            elif char.isspace() and not in_quotes:
-                if current_part:
-                    parts.append("".join(current_part))
-                    current_part = []
-            else:
-                current_part.append(char)
-
-        if current_part:
-            parts.append("".join(current_part))
-
+        parts = _COMMAND_TOKEN_RE.findall(input_data)
         return {
             "type": "command",
             "command": parts[0] if parts else "",
@@ -142,64 +197,235 @@ class CommandLineInputHandler(BaseInputHandler):
         }
 
 
-class JSONInputHandler(BaseInputHandler):
-    async def _handle_input(self, input_data: str) -> Dict[str, Any]:
+class JSONInputHandler(BaseInputHandler, structured_format="json"):
+    async def _handle_input(self, input_data: Union[str, bytes]) -> Dict[str, Any]:
         try:
-            return {"type": "json", "parsed_data": json.loads(input_data)}
-        except json.JSONDecodeError as e:
+            return {"type": "json", "parsed_data": orjson.loads(input_data)}
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Failed to parse JSON: {str(e)}")
 
 
-class XMLInputHandler(BaseInputHandler):
-    async def _handle_input(self, input_data: str) -> Dict[str, Any]:
-        root = ET.fromstring(input_data)
+class XMLInputHandler(BaseInputHandler, structured_format="xml"):
+    async def _handle_input(self, input_data: Union[str, bytes]) -> Dict[str, Any]:
+        encoding, parser = None, _XML_PARSER
+        if isinstance(input_data, str):
+            input_data = input_data.encode()
+            encoding, parser = "utf-8", _XML_TEXT_PARSER
+        if len(input_data) > _XML_STREAMING_THRESHOLD:
+            root = await _parse(len(input_data), _iterparse_to_dict, input_data, encoding)
+            return {"type": "xml", "parsed_data": {"root": root}}
+        root = etree.fromstring(input_data, parser=parser)
         return {"type": "xml", "parsed_data": {"root": self._element_to_dict(root)}}
 
-    def _element_to_dict(self, element: ET.Element) -> Dict[str, Any]:
-        result = {}
-        for child in element:
-            if len(child) == 0:
-                result[child.tag] = child.text
+    def _element_to_dict(self, element: etree._Element) -> Dict[str, Any]:
+        return _element_to_dict(element)
+
+
+def _element_to_dict(element: etree._Element, _element_type: Any = etree.Element) -> Dict[str, Any]:
+    # Each element is visited once: a child's own conversion tells whether it has element
+    # children, and leaves fall back to their text. Only element children are converted, so
+    # unexpanded entity references are skipped.
+    result = {}
+    for child in element.iterchildren(_element_type):
+        value = _element_to_dict(child)
+        result[child.tag] = value if value else child.text
+    return result
+
+
+def _iterparse_to_dict(data: bytes, encoding: Optional[str] = None) -> Dict[str, Any]:
+    # Same conversion as _element_to_dict, built from parse events: every element gets a dict
+    # on "start" that is filled by its children and attached to its parent on "end". Finished
+    # elements are cleared and detached so the tree never holds more than the open path.
+    stack: List[Dict[str, Any]] = [{}]
+    events = etree.iterparse(
+        BytesIO(data), events=("start", "end"), encoding=encoding, **_XML_PARSE_OPTIONS
+    )
+    for event, element in events:
+        if not isinstance(element.tag, str):
+            continue
+        if event == "start":
+            stack.append({})
+            continue
+        value = stack.pop()
+        if len(stack) == 1:
+            return value
+        stack[-1][element.tag] = value if value else element.text
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+    return stack[0]
+
+
+class CSVInputHandler(BaseInputHandler, structured_format="csv"):
+    def __init__(
+        self,
+        name: str,
+        output: str = "rows",
+        cache_size: int = 0,
+        schema: Optional[List[str]] = None,
+    ):
+        super().__init__(name, cache_size)
+        self.output = _check_output_layout(output)
+        # With a declared schema the convert options are built once and the header row does not
+        # have to be read before parsing; it is checked against the schema afterwards instead.
+        self.schema = list(schema) if schema is not None else None
+        self._convert_options = _string_columns(self.schema) if self.schema is not None else None
+
+    async def _handle_input(self, input_data: Union[str, bytes]) -> Dict[str, Any]:
+        if self.schema is not None:
+            if isinstance(input_data, str):
+                input_data = input_data.encode()
+            table = await _parse(
+                len(input_data),
+                pacsv.read_csv,
+                pa.BufferReader(input_data),
+                convert_options=self._convert_options,
+            )
+            if table.column_names != self.schema:
+                raise ValueError(
+                    f"CSV columns {table.column_names} do not match the schema {self.schema}"
+                )
+            return self._result(table)
+
+        # Only the header row goes through the csv module; it names the columns so every value
+        # can be read as a string, matching csv.DictReader's output. The header record is
+        # sliced out without copying the rest, and UTF-8 bytes are handed to Arrow as they are.
+        header = _header_record(input_data)
+        if isinstance(input_data, str):
+            input_data = input_data.encode()
+        else:
+            header = header.decode()
+        # Arrow drops a UTF-8 byte order mark, so it must not end up in the first column name
+        headers = next(csv.reader((header.removeprefix("\ufeff"),)), None)
+        if not headers:
+            return {
+                "type": "csv",
+                "parsed_data": {} if self.output == "columnar" else [],
+                "headers": None,
+            }
+        try:
+            table = await _parse(
+                len(input_data),
+                pacsv.read_csv,
+                pa.BufferReader(input_data),
+                convert_options=_string_columns(headers),
+            )
+        except pa.ArrowInvalid:
+            # Arrow rejects rows whose field count differs from the header. csv.DictReader
+            # accepts them, filling missing fields with None and listing extras under None.
+            return self._dict_reader_result(input_data)
+        return self._result(table)
+
+    def _result(self, table: pa.Table) -> Dict[str, Any]:
+        parsed_data = table.to_pydict() if self.output == "columnar" else table.to_pylist()
+        return {"type": "csv", "parsed_data": parsed_data, "headers": table.column_names}
+
+    def _dict_reader_result(self, input_data: bytes) -> Dict[str, Any]:
+        reader = csv.DictReader(StringIO(input_data.decode("utf-8-sig")))
+        rows = list(reader)
+        headers = reader.fieldnames
+        if self.output == "columnar":
+            return {
+                "type": "csv",
+                "parsed_data": {name: [row.get(name) for row in rows] for name in headers},
+                "headers": headers,
+            }
+        return {"type": "csv", "parsed_data": rows, "headers": headers}
+
+
+def _header_record(data: Union[str, bytes]) -> Union[str, bytes]:
+    # The first record ends at the first newline outside quotes: while the text before a
+    # newline holds an odd number of quote characters (escaped "" pairs count as two), the
+    # newline belongs to a quoted field and the record continues to the next one.
+    newline, quote = ("\n", '"') if isinstance(data, str) else (b"\n", b'"')
+    end = data.find(newline)
+    while end >= 0 and data.count(quote, 0, end) % 2:
+        end = data.find(newline, end + 1)
+    return data if end < 0 else data[:end]
+
+
+def _string_columns(headers: List[str]) -> pacsv.ConvertOptions:
+    return pacsv.ConvertOptions(
+        column_types={header: pa.string() for header in headers}, strings_can_be_null=False
+    )
+
+
+class YAMLInputHandler(BaseInputHandler, structured_format="yaml"):
+    async def _handle_input(self, input_data: Union[str, bytes]) -> Dict[str, Any]:
+        return {"type": "yaml", "parsed_data": yaml.load(input_data, Loader=_YAMLLoader)}
+
+
+class ParquetInputHandler(BaseInputHandler, structured_format="parquet"):
+    def __init__(
+        self, name: str, batch_size: int = 65536, output: str = "rows", cache_size: int = 0
+    ):
+        super().__init__(name, cache_size)
+        self.batch_size = batch_size
+        self.output = _check_output_layout(output)
+
+    async def _handle_input(
+        self, input_data: Union[bytes, bytearray, memoryview, BytesIO]
+    ) -> Dict[str, Any]:
+        # Wrap the caller's memory in an Arrow buffer rather than reading it through a
+        # Python file object; BytesIO contents are exposed without copying via getbuffer()
+        if isinstance(input_data, BytesIO):
+            input_data = input_data.getbuffer()
+        buffer = pa.py_buffer(input_data)
+        parquet_file = pq.ParquetFile(pa.BufferReader(buffer))
+        schema = parquet_file.schema_arrow
+        batches = parquet_file.iter_batches(batch_size=self.batch_size)
+        columnar = self.output == "columnar"
+        rows: List[Dict[str, Any]] = []
+        columns: Dict[str, List[Any]] = {column: [] for column in schema.names}
+
+        def consume(batch: pa.RecordBatch) -> None:
+            if columnar:
+                for column, values in batch.to_pydict().items():
+                    columns[column].extend(values)
             else:
-                result[child.tag] = self._element_to_dict(child)
-        return result
-
-
-class CSVInputHandler(BaseInputHandler):
-    async def _handle_input(self, input_data: str) -> Dict[str, Any]:
-        csv_data = csv.DictReader(StringIO(input_data))
-        return {"type": "csv", "parsed_data": list(csv_data), "headers": csv_data.fieldnames}
+                rows.extend(batch.to_pylist())
 
-
-class YAMLInputHandler(BaseInputHandler):
-    async def _handle_input(self, input_data: str) -> Dict[str, Any]:
-        return {"type": "yaml", "parsed_data": yaml.safe_load(input_data)}
-
-
-class ParquetInputHandler(BaseInputHandler):
-    async def _handle_input(self, input_data: Union[bytes, BytesIO]) -> Dict[str, Any]:
-        if isinstance(input_data, bytes):
-            input_data = BytesIO(input_data)
-        table = pq.read_table(input_data)
-        df = table.to_pandas()
+        if buffer.size > _THREAD_OFFLOAD_THRESHOLD:
+            await _consume_prefetched(batches, consume)
+        else:
+            for batch in batches:
+                consume(batch)
         return {
             "type": "parquet",
-            "parsed_data": df.to_dict(orient="records"),
-            "schema": table.schema.to_string(),
-            "num_rows": len(df),
-            "num_columns": len(df.columns),
+            "parsed_data": columns if columnar else rows,
+            "schema": schema.to_string(),
+            "num_rows": parquet_file.metadata.num_rows,
+            "num_columns": len(schema),
         }
 
 
+async def _consume_prefetched(
+    batches: Iterator[pa.RecordBatch], consume: Callable[[pa.RecordBatch], None]
+) -> None:
+    # Each record batch is decoded in a worker thread (Arrow releases the GIL) while the
+    # previous one is turned into Python objects, instead of decoding the whole file first.
+    # The pending decode is always waited for, so an error or cancellation while consuming
+    # does not leave a worker job behind whose result is never retrieved.
+    pending = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+    try:
+        while (batch := await pending) is not None:
+            pending = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+            consume(batch)
+    finally:
+        if not pending.done():
+            await asyncio.wait((pending,))
+        if not pending.cancelled():
+            pending.exception()
+
+
 class StructuredDataDetector(BaseInputHandler):
-    def __init__(self, name: str):
-        super().__init__(name)
+    def __init__(self, name: str, cache_size: int = 0):
+        super().__init__(name, cache_size)
         self.handlers = {
-            "json": JSONInputHandler("JSONDetector"),
-            "xml": XMLInputHandler("XMLDetector"),
-            "csv": CSVInputHandler("CSVDetector"),
-            "yaml": YAMLInputHandler("YAMLDetector"),
-            "parquet": ParquetInputHandler("ParquetDetector"),
+            structured_format: handler_class(
+                handler_class.__name__.removesuffix("InputHandler") + "Detector"
+            )
+            for structured_format, handler_class in _STRUCTURED_HANDLERS.items()
         }
 
     async def _handle_input(self, input_data: Any) -> Dict[str, Any]:
@@ -211,18 +437,15 @@ class StructuredDataDetector(BaseInputHandler):
 
     def _detect_type(self, input_data: Any) -> Optional[str]:
         if isinstance(input_data, bytes):
-            try:
-                pq.read_table(BytesIO(input_data))
+            # Parquet files start and end with the PAR1 magic; no need to parse to detect them
+            if input_data[:4] == _PARQUET_MAGIC and input_data[-4:] == _PARQUET_MAGIC:
                 return "parquet"
-            except:
-                pass
 
         if isinstance(input_data, str):
             input_data = input_data.strip()
-            if input_data.startswith("{") and input_data.endswith("}"):
-                return "json"
-            elif input_data.startswith("<") and input_data.endswith(">"):
-                return "xml"
+            delimited = _DELIMITED_FORMATS.get((input_data[:1], input_data[-1:]))
+            if delimited:
+                return delimited
             elif "," in input_data and "\n" in input_data:
                 return "csv"
             elif ":" in input_data and ("-" in input_data or input_data.count("\n") > 1):
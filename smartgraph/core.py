@@ -1,7 +1,8 @@
 # smartgraph/core.py
 
 import asyncio
-from typing import Any, Dict, List, Optional
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
 from reactivex import Observable
 from reactivex import operators as ops
@@ -21,6 +22,8 @@ class ReactiveComponent:
         self.input: Subject = Subject()
         self.output: Subject = Subject()
         self.error: Subject = Subject()
+        # In-flight async process() calls in input order; also keeps them from being collected
+        self._pending: Deque[asyncio.Task] = deque()
 
         self.input.subscribe(self._process_input)
 
@@ -28,23 +31,58 @@ class ReactiveComponent:
         logger.debug(f"{self.name} received input: {input_data}")
         try:
             result = self.process(input_data)
-            logger.debug(f"{self.name} processed input. Result: {result}")
-            self.output.on_next(result)
+            if asyncio.iscoroutine(result):
+                try:
+                    loop = asyncio.get_running_loop()
+                except RuntimeError:
+                    # Outside an event loop the coroutine is driven here, so subscribers
+                    # receive awaited values either way
+                    result = asyncio.run(result)
+                else:
+                    # Run async components on the current loop and emit their awaited values
+                    task = loop.create_task(result)
+                    self._pending.append(task)
+                    task.add_done_callback(self._release_finished)
+                    return
         except Exception as e:
-            logger.error(f"{self.name} failed to process input: {e}")
-            self.error.on_next(e)
+            self._emit_error(e)
+            return
+        self._emit_result(result)
+
+    def _release_finished(self, _task: asyncio.Task):
+        # Tasks can finish in any order. Results are only released from the front of the queue,
+        # so outputs keep the order of their inputs.
+        while self._pending and self._pending[0].done():
+            task = self._pending.popleft()
+            if task.cancelled():
+                continue
+            error = task.exception()
+            if error is not None:
+                self._emit_error(error)
+            else:
+                self._emit_result(task.result())
+
+    def _emit_result(self, result: Any):
+        logger.debug(f"{self.name} processed input. Result: {result}")
+        self.output.on_next(result)
+
+    def _emit_error(self, error: Exception):
+        logger.error(f"{self.name} failed to process input: {error}")
+        self.error.on_next(error)
 
     def create_state(self, key: str, initial_value: Any) -> BehaviorSubject:
-        if key not in self._states:
-            self._states[key] = BehaviorSubject(initial_value)
-        return self._states[key]
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = BehaviorSubject(initial_value)
+        return state
 
     def get_state(self, key: str) -> Optional[BehaviorSubject]:
         return self._states.get(key)
 
     def update_state(self, key: str, value: Any) -> None:
-        if key in self._states:
-            self._states[key].on_next(value)
+        state = self._states.get(key)
+        if state is not None:
+            state.on_next(value)
 
     async def process(self, input_data: Any) -> Any:
         raise NotImplementedError("Subclasses must implement process method")
@@ -112,6 +150,7 @@ class ReactiveSmartGraph:
         self.connections: Dict[str, Dict[str, List[Dict[str, str]]]] = {}
         self.is_compiled = False
         self.runtime_args: Dict[str, Any] = {}
+        self._pipeline_steps: Dict[str, List[Tuple[Callable[[Any], Any], bool]]] = {}
 
     def create_pipeline(self, name: str) -> Pipeline:
         if name in self.pipelines:
@@ -170,6 +209,7 @@ class ReactiveSmartGraph:
                     ]
                     source.output.subscribe(target_component.input)
 
+        self._pipeline_steps = {}
         self.is_compiled = True
         logger.info("Graph compiled successfully")
 
@@ -255,17 +295,17 @@ class ReactiveSmartGraph:
         if pipeline_name not in self.pipelines:
             return Observable.throw(ConfigurationError(f"Pipeline {pipeline_name} does not exist"))
 
-        pipeline = self.pipelines[pipeline_name]
+        steps = self._get_pipeline_steps(pipeline_name)
 
         def subscribe(observer, scheduler=None):
             async def process_pipeline():
                 try:
                     current_data = input_data
-                    for component in pipeline.components.values():
-                        if asyncio.iscoroutinefunction(component.process):
-                            current_data = await component.process(current_data)
+                    for process, is_async in steps:
+                        if is_async:
+                            current_data = await process(current_data)
                         else:
-                            current_data = component.process(current_data)
+                            current_data = process(current_data)
                     observer.on_next(current_data)
                     observer.on_completed()
                 except Exception as e:
@@ -278,6 +318,19 @@ class ReactiveSmartGraph:
 
         return Observable(subscribe)
 
+    def _get_pipeline_steps(self, pipeline_name: str) -> List[Tuple[Callable[[Any], Any], bool]]:
+        # Each component's bound process method, and whether it is a coroutine function, is
+        # fixed once the graph is compiled, so resolve both once per pipeline instead of on
+        # every execution. compile() clears the cache.
+        steps = self._pipeline_steps.get(pipeline_name)
+        if steps is None:
+            steps = []
+            for component in self.pipelines[pipeline_name].components.values():
+                process = component.process
+                steps.append((process, asyncio.iscoroutinefunction(process)))
+            self._pipeline_steps[pipeline_name] = steps
+        return steps
+
     async def _cancel_after_timeout(self, task, timeout, observer):
         await asyncio.sleep(timeout)
         if not task.done():
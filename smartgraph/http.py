@@ -0,0 +1,45 @@
+# smartgraph/http.py
+
+from typing import Optional
+
+import httpx
+import litellm
+
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+
+class _Shared:
+    # Holds the process-wide client; replaced on first use after shutdown()
+    client: Optional[httpx.AsyncClient] = None
+
+
+def shared_async_client() -> httpx.AsyncClient:
+    """Return the process-wide HTTP client, creating it on first use.
+
+    Reusing one pooled client keeps connections alive between LLM and toolkit requests
+    instead of paying for DNS, TCP and TLS setup on every call.
+    """
+    if _Shared.client is None or _Shared.client.is_closed:
+        _Shared.client = httpx.AsyncClient(limits=_LIMITS)
+    return _Shared.client
+
+
+def install() -> httpx.AsyncClient:
+    """Route LiteLLM's async OpenAI-compatible requests through the shared client.
+
+    This is opt-in because it sets the process-wide ``litellm.aclient_session``, and the
+    client's pooled connections belong to the event loop they were opened on. Call it from
+    the loop that runs the graph and call shutdown() before that loop closes.
+    """
+    litellm.aclient_session = shared_async_client()
+    return litellm.aclient_session
+
+
+async def shutdown() -> None:
+    """Close the shared HTTP client. Call once at application exit."""
+    client, _Shared.client = _Shared.client, None
+    if client is not None:
+        # Unset the client installed in LiteLLM too, so it does not keep using a closed one
+        if litellm.aclient_session is client:
+            litellm.aclient_session = None
+        await client.aclose()
@@ -0,0 +1,74 @@
+# smartgraph/rate_limit.py
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+# Requests per second allowed for each model, shared by every CompletionComponent using it.
+# Empty by default; populate it to match the provider limits of your account, e.g.
+# MODEL_LIMITS["gpt-4o"] = 500 / 60
+MODEL_LIMITS: Dict[str, float] = {}
+
+_model_limiters: Dict[str, "AsyncTokenBucket"] = {}
+
+
+class AsyncTokenBucket:
+    """Token-bucket rate limiter for asyncio code.
+
+    Tokens refill continuously at ``rate_per_sec`` up to ``burst``; each ``async with``
+    block consumes one token and waits when none are available. Waiters are served in
+    arrival order.
+
+    Args:
+        rate_per_sec (float): Sustained number of acquisitions allowed per second.
+        burst (Optional[int]): Maximum number of tokens held at once. Defaults to
+            ``max(1, int(rate_per_sec))``.
+
+    Example:
+        >>> limiter = AsyncTokenBucket(rate_per_sec=5, burst=10)
+        >>> async with limiter:
+        ...     await litellm.acompletion(...)
+    """
+
+    def __init__(self, rate_per_sec: float, burst: Optional[int] = None):
+        if rate_per_sec <= 0:
+            raise ValueError("rate_per_sec must be positive")
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst if burst is not None else max(1, int(rate_per_sec))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it."""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_sec)
+                self._refill()
+            self._tokens -= 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_per_sec)
+        self._updated_at = now
+
+    async def __aenter__(self) -> "AsyncTokenBucket":
+        """Wait for a token, so the limiter can guard a block with ``async with``."""
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Tokens are not returned, so there is nothing to release."""
+        return None
+
+
+def limiter_for_model(model: str) -> Optional[AsyncTokenBucket]:
+    """Return the limiter shared by all callers of ``model``, if MODEL_LIMITS configures one."""
+    rate = MODEL_LIMITS.get(model)
+    if rate is None:
+        return None
+    limiter = _model_limiters.get(model)
+    if limiter is None or limiter.rate_per_sec != rate:
+        limiter = _model_limiters[model] = AsyncTokenBucket(rate)
+    return limiter
@@ -0,0 +1,167 @@
+# smartgraph/semantic_cache.py
+
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import litellm
+import numpy as np
+
+EmbedFunction = Callable[[str], Awaitable[List[float]]]
+
+_INITIAL_CAPACITY = 16
+
+
+class SemanticCache:
+    """Bounded LRU cache of LLM responses looked up by embedding similarity.
+
+    Entries are partitioned by a hashable scope (e.g. system prompt and tool set) and a
+    lookup hits when the cosine similarity between the query embedding and a stored
+    embedding in the same scope reaches ``threshold``.
+
+    Embeddings are kept in one contiguous float32 matrix with precomputed norms, so a
+    lookup scores every entry with a single matrix-vector product.
+
+    Args:
+        embedding_model (str): LiteLLM embedding model used when ``embed_fn`` is not given.
+        threshold (float): Minimum cosine similarity for a cache hit.
+        max_size (int): Maximum number of cached responses; least recently used are evicted.
+        ttl (Optional[float]): Seconds an entry stays valid, or None to never expire.
+        embed_fn (Optional[EmbedFunction]): Async callable returning the embedding of a text.
+
+    Example:
+        >>> cache = SemanticCache(threshold=0.9)
+        >>> assistant = CompletionComponent("Assistant", model="gpt-4o", response_cache=cache)
+    """
+
+    def __init__(
+        self,
+        embedding_model: str = "text-embedding-3-small",
+        threshold: float = 0.92,
+        max_size: int = 256,
+        ttl: Optional[float] = 3600.0,
+        embed_fn: Optional[EmbedFunction] = None,
+    ):
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self._embed_fn = embed_fn
+        self.clear()
+
+    def __len__(self) -> int:
+        """Return the number of cached responses."""
+        return int(self._occupied.sum())
+
+    async def embed(self, text: str) -> List[float]:
+        """Return the embedding vector for ``text``."""
+        if self._embed_fn is not None:
+            return await self._embed_fn(text)
+        response = await litellm.aembedding(model=self.embedding_model, input=[text])
+        return response.data[0]["embedding"]
+
+    def lookup(self, scope: Hashable, vector: List[float]) -> Optional[Any]:
+        """Return the cached response most similar to ``vector`` within ``scope``, if any."""
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is None or self._vectors is None:
+            return None
+        query = np.asarray(vector, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query))
+        if not query_norm:
+            return None
+
+        expired = self._occupied & (self._expires < time.monotonic())
+        if expired.any():
+            self._release(expired)
+        candidates = self._occupied & (self._scopes == scope_id) & (self._norms > 0)
+        if not candidates.any():
+            return None
+
+        scores = np.divide(
+            self._vectors @ query,
+            self._norms * query_norm,
+            out=np.full(len(candidates), -np.inf, dtype=np.float32),
+            where=candidates,
+        )
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        self._touch(best)
+        return self._responses[best]
+
+    def store(self, scope: Hashable, vector: List[float], response: Any) -> None:
+        """Cache ``response`` under ``vector`` within ``scope``."""
+        row = np.asarray(vector, dtype=np.float32)
+        if self._vectors is None:
+            self._allocate(min(_INITIAL_CAPACITY, self.max_size), row.shape[0])
+        slot = self._free_slot()
+        self._vectors[slot] = row
+        self._norms[slot] = np.linalg.norm(row)
+        self._expires[slot] = time.monotonic() + self.ttl if self.ttl is not None else math.inf
+        self._scopes[slot] = self._scope_id(scope)
+        self._occupied[slot] = True
+        self._responses[slot] = response
+        self._touch(slot)
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        self._vectors: Optional[np.ndarray] = None
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._expires = np.zeros(0, dtype=np.float64)
+        self._scopes = np.zeros(0, dtype=np.int64)
+        self._last_used = np.zeros(0, dtype=np.int64)
+        self._occupied = np.zeros(0, dtype=bool)
+        self._responses: List[Any] = []
+        self._scope_ids: Dict[Hashable, int] = {}
+        self._next_scope_id = 0
+        self._clock = 0
+
+    def _scope_id(self, scope: Hashable) -> int:
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is not None:
+            return scope_id
+        # Scopes can be short-lived (e.g. one per conversation state), so once the map outgrows
+        # the cache those without a live entry are forgotten
+        if len(self._scope_ids) >= 2 * self.max_size:
+            live = set(self._scopes[self._occupied].tolist())
+            self._scope_ids = {s: i for s, i in self._scope_ids.items() if i in live}
+        scope_id = self._scope_ids[scope] = self._next_scope_id
+        self._next_scope_id += 1
+        return scope_id
+
+    def _allocate(self, capacity: int, dim: int) -> None:
+        old_size = len(self._occupied)
+        vectors = np.zeros((capacity, dim), dtype=np.float32)
+        if self._vectors is not None:
+            vectors[:old_size] = self._vectors
+        self._vectors = vectors
+        self._norms = np.resize(self._norms, capacity)
+        self._expires = np.resize(self._expires, capacity)
+        self._scopes = np.resize(self._scopes, capacity)
+        self._last_used = np.resize(self._last_used, capacity)
+        occupied = np.zeros(capacity, dtype=bool)
+        occupied[:old_size] = self._occupied
+        self._occupied = occupied
+        self._responses.extend([None] * (capacity - old_size))
+
+    def _free_slot(self) -> int:
+        free = np.flatnonzero(~self._occupied)
+        if free.size:
+            return int(free[0])
+        capacity = len(self._occupied)
+        if capacity < self.max_size:
+            self._allocate(min(capacity * 2, self.max_size), self._vectors.shape[1])
+            return capacity
+        # Full: evict the least recently used entry
+        slot = int(np.argmin(self._last_used))
+        self._release(slot)
+        return slot
+
+    def _release(self, slots: Any) -> None:
+        self._occupied[slots] = False
+        for slot in np.atleast_1d(np.arange(len(self._occupied))[slots]):
+            self._responses[slot] = None
+
+    def _touch(self, slot: int) -> None:
+        self._clock += 1
+        self._last_used[slot] = self._clock
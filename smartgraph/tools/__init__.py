@@ -1,9 +1,36 @@
 # smartgraph/tools/__init__.py
 
-from .base_toolkit import Toolkit
-from .duck_memory_toolkit import DuckMemoryToolkit
-from .duckduckgo_toolkit import DuckDuckGoToolkit
-from .memory_toolkit import MemoryToolkit
-from .tavily_toolkit import TavilyToolkit
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .base_toolkit import Toolkit
+    from .duck_memory_toolkit import DuckMemoryToolkit
+    from .duckduckgo_toolkit import DuckDuckGoToolkit
+    from .memory_toolkit import MemoryToolkit
+    from .tavily_toolkit import TavilyToolkit
+
+# Toolkits are imported on first access so that their backends (duckdb, tavily,
+# duckduckgo_search) are only loaded when a toolkit is actually used.
+_LAZY_IMPORTS = {
+    "DuckDuckGoToolkit": ".duckduckgo_toolkit",
+    "TavilyToolkit": ".tavily_toolkit",
+    "MemoryToolkit": ".memory_toolkit",
+    "Toolkit": ".base_toolkit",
+    "DuckMemoryToolkit": ".duck_memory_toolkit",
+}
 
 __all__ = ["DuckDuckGoToolkit", "TavilyToolkit", "MemoryToolkit", "Toolkit", "DuckMemoryToolkit"]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
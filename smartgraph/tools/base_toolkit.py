@@ -1,10 +1,15 @@
 # smartgraph/tools/base_toolkit.py
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple
 
 
 class Toolkit(ABC):
+    # Seconds for which identical calls to this toolkit's functions may be served from a
+    # cache by the caller. None disables caching, which is the safe default for stateful tools.
+    cache_ttl: Optional[float] = None
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -23,6 +28,14 @@ class Toolkit(ABC):
         """Return a dictionary of functions provided by the toolkit."""
         pass
 
+    @cached_property
+    def _fn_table(self) -> Tuple[Tuple[str, Optional[str], Dict[str, Any]], ...]:
+        """Name, docstring and parameter schema of each function, resolved once per instance."""
+        return tuple(
+            (name, func.__doc__, getattr(func, "schema", {}))
+            for name, func in self.functions.items()
+        )
+
     @property
     def schemas(self) -> List[Dict[str, Any]]:
         """Return a list of function schemas for the toolkit."""
@@ -31,9 +44,9 @@ class Toolkit(ABC):
                 "type": "function",
                 "function": {
                     "name": name,
-                    "description": func.__doc__,
-                    "parameters": getattr(func, "schema", {}),
+                    "description": doc,
+                    "parameters": schema,
                 },
             }
-            for name, func in self.functions.items()
+            for name, doc, schema in self._fn_table
         ]
@@ -1,25 +1,164 @@
-import json
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import cached_property, lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import duckdb
+import orjson
 
-from .base_toolkit import Toolkit
+from ..logging import SmartGraphLogger
+from .memory_toolkit import MemoryToolkit
 
+logger = SmartGraphLogger.get_logger()
 
-class DuckMemoryToolkit(Toolkit):
-    def __init__(self, db_path: str = ":memory:"):
+_UPSERT_MEMORY_SQL = """
+    INSERT INTO memories (key, value, created_at, updated_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (key) DO UPDATE SET
+        value = excluded.value,
+        updated_at = ?
+"""
+_GET_MEMORY_SQL = "SELECT value FROM memories WHERE key = ?"
+_DELETE_MEMORY_SQL = "DELETE FROM memories WHERE key = ?"
+_CLEAR_MEMORIES_SQL = "DELETE FROM memories"
+_LIKE_SEARCH_SQL = """
+    SELECT key, value, created_at, updated_at
+    FROM memories
+    WHERE key LIKE ? OR value LIKE ?
+"""
+_FTS_SEARCH_SQL = """
+    SELECT key, value, created_at, updated_at
+    FROM (
+        SELECT *, fts_main_memories.match_bm25(key, ?) AS score
+        FROM memories
+        WHERE updated_at < ?
+    )
+    WHERE score IS NOT NULL
+    ORDER BY score DESC
+"""
+_LIKE_SEARCH_SINCE_SQL = """
+    SELECT key, value, created_at, updated_at
+    FROM memories
+    WHERE updated_at >= ? AND (key LIKE ? OR value LIKE ?)
+"""
+
+_BULK_INSERT_ROWS = 1000
+
+
+@lru_cache(maxsize=8)
+def _bulk_upsert_sql(rows: int) -> str:
+    return f"""
+        INSERT INTO memories (key, value, created_at, updated_at)
+        VALUES {", ".join(["(?, ?, ?, ?)"] * rows)}
+        ON CONFLICT (key) DO UPDATE SET
+            value = excluded.value,
+            updated_at = excluded.updated_at
+    """
+
+
+_SCHEMAS: List[Dict[str, Any]] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "add_memory",
+            "description": "Add a new memory or update an existing one.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "key": {
+                        "type": "string",
+                        "description": "The unique identifier for the memory",
+                    },
+                    "value": {"type": "object", "description": "The content of the memory"},
+                },
+                "required": ["key", "value"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_memory",
+            "description": "Retrieve a memory by its key.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "key": {
+                        "type": "string",
+                        "description": "The unique identifier for the memory to retrieve",
+                    }
+                },
+                "required": ["key"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_memories",
+            "description": "Search memories based on a query string.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The search query to match against memory contents",
+                    }
+                },
+                "required": ["query"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "delete_memory",
+            "description": "Delete a memory by its key.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "key": {
+                        "type": "string",
+                        "description": "The unique identifier for the memory to delete",
+                    }
+                },
+                "required": ["key"],
+            },
+        },
+    },
+]
+
+
+class DuckMemoryToolkit(MemoryToolkit):
+    def __init__(
+        self, db_path: str = ":memory:", use_fts: bool = False, fts_rebuild_interval: float = 60.0
+    ):
         self.conn = duckdb.connect(db_path)
         self.conn.execute(
             """
             CREATE TABLE IF NOT EXISTS memories (
                 key VARCHAR PRIMARY KEY,
-                value JSON,
+                value VARCHAR,
                 created_at TIMESTAMP,
                 updated_at TIMESTAMP
             )
         """
         )
+        # search_memories matches substrings by default. use_fts switches it to ranked BM25
+        # matching of whole (stemmed) words, which finds different rows, so it is opt-in.
+        self._fts_enabled = use_fts and self._load_fts()
+        self._fts_rebuild_interval = fts_rebuild_interval
+        self._fts_stale = True
+        self._fts_indexed_at: Optional[datetime] = None
+        self._fts_built_at = 0.0
+
+    def _load_fts(self) -> bool:
+        # The FTS extension may be unavailable (e.g. offline installs); fall back to LIKE scans.
+        try:
+            self.conn.execute("INSTALL fts; LOAD fts;")
+            return True
+        except duckdb.Error:
+            return False
 
     @property
     def name(self) -> str:
@@ -29,7 +168,7 @@ class DuckMemoryToolkit(Toolkit):
     def description(self) -> str:
         return "A memory toolkit using DuckDB for storage and retrieval of information."
 
-    @property
+    @cached_property
     def functions(self) -> Dict[str, Any]:
         return {
             "add_memory": self.add_memory,
@@ -39,119 +178,97 @@ class DuckMemoryToolkit(Toolkit):
         }
 
     async def add_memory(self, key: str, value: Any) -> None:
-        json_value = json.dumps(value)
-        current_time = datetime.now().isoformat()
+        # Values are serialized with orjson and stored as plain text so DuckDB does not
+        # have to parse and validate JSON on every write.
+        json_value = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+        current_time = datetime.now()
         self.conn.execute(
-            """
-            INSERT INTO memories (key, value, created_at, updated_at)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT (key) DO UPDATE SET
-                value = excluded.value,
-                updated_at = ?
-        """,
-            [key, json_value, current_time, current_time, current_time],
+            _UPSERT_MEMORY_SQL, [key, json_value, current_time, current_time, current_time]
         )
+        self._fts_stale = True
+
+    async def add_memories(self, items: Iterable[Tuple[str, Any]]) -> None:
+        """Add or update several memories, inserting up to 1000 per statement."""
+        # One multi-row INSERT is planned once for the whole chunk, whereas executemany runs
+        # a statement per row. DuckDB rejects a statement that upserts the same key twice, so
+        # duplicates are collapsed first and the last value wins, as with repeated add_memory.
+        current_time = datetime.now()
+        rows = list(dict(items).items())
+        for start in range(0, len(rows), _BULK_INSERT_ROWS):
+            chunk = rows[start : start + _BULK_INSERT_ROWS]
+            params: List[Any] = []
+            for key, value in chunk:
+                json_value = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+                params += (key, json_value, current_time, current_time)
+            self.conn.execute(_bulk_upsert_sql(len(chunk)), params)
+        if rows:
+            self._fts_stale = True
 
     async def get_memory(self, key: str) -> Optional[Any]:
-        result = self.conn.execute("SELECT value FROM memories WHERE key = ?", [key]).fetchone()
+        result = self.conn.execute(_GET_MEMORY_SQL, [key]).fetchone()
         if result:
-            return json.loads(result[0])
+            return orjson.loads(result[0])
         return None
 
     async def search_memories(self, query: str) -> List[Dict[str, Any]]:
-        # Use JSON extraction to search within the value column
-        results = self.conn.execute(
-            """
-            SELECT key, value, created_at, updated_at
-            FROM memories
-            WHERE key LIKE ? OR json_extract(value, '$') LIKE ?
-        """,
-            [f"%{query}%", f"%{query}%"],
-        ).fetchall()
+        if self._fts_enabled:
+            try:
+                results = self._fts_search(query)
+            except duckdb.Error as e:
+                # Only this search falls back; the index is tried again on the next one
+                logger.warning(f"Full-text search failed, falling back to LIKE: {e}")
+                results = self._like_search(query)
+        else:
+            results = self._like_search(query)
 
         return [
             {
                 "key": row[0],
-                "value": json.loads(row[1]),
+                "value": orjson.loads(row[1]),
                 "created_at": row[2].isoformat() if row[2] else None,
                 "updated_at": row[3].isoformat() if row[3] else None,
             }
             for row in results
         ]
 
+    def _fts_search(self, query: str) -> List[tuple]:
+        # DuckDB does not maintain the FTS index on writes and rebuilding it re-tokenizes the
+        # whole table, so it is rebuilt at most once per fts_rebuild_interval. Between rebuilds
+        # the index answers for rows unchanged since it was built, rows written since are
+        # matched with LIKE, and deleted rows drop out of the join with the table. Results
+        # therefore depend on when the index was last rebuilt: a recently written row matches
+        # by substring, and only by whole words after the next rebuild. fts_rebuild_interval=0
+        # rebuilds before any search that follows a write, for consistent BM25 matching.
+        if self._fts_stale and (
+            self._fts_indexed_at is None
+            or time.monotonic() - self._fts_built_at >= self._fts_rebuild_interval
+        ):
+            self._fts_indexed_at = datetime.now()
+            self.conn.execute(
+                "PRAGMA create_fts_index('memories', 'key', 'key', 'value', overwrite=1)"
+            )
+            self._fts_built_at = time.monotonic()
+            self._fts_stale = False
+        results = self.conn.execute(_FTS_SEARCH_SQL, [query, self._fts_indexed_at]).fetchall()
+        if self._fts_stale:
+            pattern = f"%{query}%"
+            results += self.conn.execute(
+                _LIKE_SEARCH_SINCE_SQL, [self._fts_indexed_at, pattern, pattern]
+            ).fetchall()
+        return results
+
+    def _like_search(self, query: str) -> List[tuple]:
+        return self.conn.execute(_LIKE_SEARCH_SQL, [f"%{query}%", f"%{query}%"]).fetchall()
+
     async def delete_memory(self, key: str) -> None:
-        self.conn.execute("DELETE FROM memories WHERE key = ?", [key])
+        self.conn.execute(_DELETE_MEMORY_SQL, [key])
+        self._fts_stale = True
+
+    async def clear_memories(self) -> None:
+        """Delete every memory, keeping the connection and table for reuse."""
+        self.conn.execute(_CLEAR_MEMORIES_SQL)
+        self._fts_stale = True
 
     @property
     def schemas(self) -> List[Dict[str, Any]]:
-        return [
-            {
-                "type": "function",
-                "function": {
-                    "name": "add_memory",
-                    "description": "Add a new memory or update an existing one.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "key": {
-                                "type": "string",
-                                "description": "The unique identifier for the memory",
-                            },
-                            "value": {"type": "object", "description": "The content of the memory"},
-                        },
-                        "required": ["key", "value"],
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_memory",
-                    "description": "Retrieve a memory by its key.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "key": {
-                                "type": "string",
-                                "description": "The unique identifier for the memory to retrieve",
-                            }
-                        },
-                        "required": ["key"],
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_memories",
-                    "description": "Search memories based on a query string.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "The search query to match against memory contents",
-                            }
-                        },
-                        "required": ["query"],
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "delete_memory",
-                    "description": "Delete a memory by its key.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "key": {
-                                "type": "string",
-                                "description": "The unique identifier for the memory to delete",
-                            }
-                        },
-                        "required": ["key"],
-                    },
-                },
-            },
-        ]
+        return list(_SCHEMAS)
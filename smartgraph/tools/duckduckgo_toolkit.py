@@ -1,17 +1,34 @@
 # smartgraph/tools/duckduckgo_toolkit.py
 
+import asyncio
 import json
+from contextlib import nullcontext
+from functools import cache, cached_property, partial
 from typing import Any, Dict, List, Optional
 
 from duckduckgo_search import DDGS
 
+from ..rate_limit import AsyncTokenBucket
 from .base_toolkit import Toolkit
 
 
+@cache
+def _get_ddgs() -> DDGS:
+    """Return a process-wide DDGS client so toolkits share one HTTP session."""
+    return DDGS()
+
+
 class DuckDuckGoToolkit(Toolkit):
-    def __init__(self, max_results: int = 5):
+    def __init__(
+        self,
+        max_results: int = 5,
+        cache_ttl: Optional[float] = 60.0,
+        rate_limiter: Optional[AsyncTokenBucket] = None,
+    ):
         self.max_results = max_results
-        self.ddgs = DDGS()
+        self.cache_ttl = cache_ttl
+        self.rate_limiter = rate_limiter
+        self.ddgs = _get_ddgs()
 
     @property
     def name(self) -> str:
@@ -21,7 +38,7 @@ class DuckDuckGoToolkit(Toolkit):
     def description(self) -> str:
         return "A toolkit for performing web searches and fetching news using DuckDuckGo."
 
-    @property
+    @cached_property
     def functions(self) -> Dict[str, Any]:
         return {"duckduckgo_search": self.search, "duckduckgo_news": self.news}
 
@@ -69,11 +86,19 @@ class DuckDuckGoToolkit(Toolkit):
     async def search(self, query: str, max_results: Optional[int] = None) -> str:
         """Perform a web search using DuckDuckGo."""
         max_results = max_results or self.max_results
-        results = list(self.ddgs.text(keywords=query, max_results=max_results))
-        return json.dumps(results, indent=2)
+        loop = asyncio.get_running_loop()
+        async with self.rate_limiter or nullcontext():
+            results = await loop.run_in_executor(
+                None, partial(self.ddgs.text, keywords=query, max_results=max_results)
+            )
+        return json.dumps(list(results), indent=2)
 
     async def news(self, query: str, max_results: Optional[int] = None) -> str:
         """Get the latest news from DuckDuckGo."""
         max_results = max_results or self.max_results
-        results = list(self.ddgs.news(keywords=query, max_results=max_results))
-        return json.dumps(results, indent=2)
+        loop = asyncio.get_running_loop()
+        async with self.rate_limiter or nullcontext():
+            results = await loop.run_in_executor(
+                None, partial(self.ddgs.news, keywords=query, max_results=max_results)
+            )
+        return json.dumps(list(results), indent=2)
@@ -1,4 +1,5 @@
-from typing import Any, Dict, List, Optional, abstractmethod
+from abc import abstractmethod
+from typing import Any, Dict, List, Optional
 
 from .base_toolkit import Toolkit
 
@@ -22,18 +23,22 @@ class MemoryToolkit(Toolkit):
         """Return a dictionary of functions provided by the toolkit."""
         pass
 
+    @abstractmethod
     async def add_memory(self, key: str, value: Any) -> None:
         """Add a new memory or update an existing one."""
         pass
 
+    @abstractmethod
     async def get_memory(self, key: str) -> Optional[Any]:
         """Retrieve a memory by its key."""
         pass
 
+    @abstractmethod
     async def search_memories(self, query: str) -> List[Dict[str, Any]]:
         """Search memories based on a query."""
         pass
 
+    @abstractmethod
     async def delete_memory(self, key: str) -> None:
         """Delete a memory by its key."""
         pass
@@ -2,13 +2,15 @@
 
 import asyncio
 import json
-from functools import partial
+from contextlib import nullcontext
+from functools import cached_property, partial
 from os import getenv
 from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
 from tavily import TavilyClient
 
+from ..rate_limit import AsyncTokenBucket
 from .base_toolkit import Toolkit
 
 load_dotenv()
@@ -21,6 +23,8 @@ class TavilyToolkit(Toolkit):
         search_depth: str = "advanced",
         max_tokens: int = 4000,
         include_answer: bool = True,
+        cache_ttl: Optional[float] = 60.0,
+        rate_limiter: Optional[AsyncTokenBucket] = None,
     ):
         self.api_key = api_key or getenv("TAVILY_API_KEY")
         if not self.api_key:
@@ -30,6 +34,8 @@ class TavilyToolkit(Toolkit):
         self.search_depth = search_depth
         self.max_tokens = max_tokens
         self.include_answer = include_answer
+        self.cache_ttl = cache_ttl
+        self.rate_limiter = rate_limiter
 
     @property
     def name(self) -> str:
@@ -39,7 +45,7 @@ class TavilyToolkit(Toolkit):
     def description(self) -> str:
         return "A toolkit for performing web searches using the Tavily API."
 
-    @property
+    @cached_property
     def functions(self) -> Dict[str, Any]:
         return {
             "tavily_search": self.search,
@@ -87,31 +93,33 @@ class TavilyToolkit(Toolkit):
     async def search(self, query: str, max_results: int = 5) -> str:
         """Search the web using Tavily API."""
         loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(
-            None,
-            partial(
-                self.client.search,
-                query=query,
-                search_depth=self.search_depth,
-                max_results=max_results,
-                include_answer=self.include_answer,
-            ),
-        )
+        async with self.rate_limiter or nullcontext():
+            response = await loop.run_in_executor(
+                None,
+                partial(
+                    self.client.search,
+                    query=query,
+                    search_depth=self.search_depth,
+                    max_results=max_results,
+                    include_answer=self.include_answer,
+                ),
+            )
         return json.dumps(self._process_response(response, query))
 
     async def search_with_context(self, query: str) -> str:
         """Search the web using Tavily API with context."""
         loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(
-            None,
-            partial(
-                self.client.get_search_context,
-                query=query,
-                search_depth=self.search_depth,
-                max_tokens=self.max_tokens,
-                include_answer=self.include_answer,
-            ),
-        )
+        async with self.rate_limiter or nullcontext():
+            response = await loop.run_in_executor(
+                None,
+                partial(
+                    self.client.get_search_context,
+                    query=query,
+                    search_depth=self.search_depth,
+                    max_tokens=self.max_tokens,
+                    include_answer=self.include_answer,
+                ),
+            )
         return response
 
     def _process_response(self, response: Dict[str, Any], query: str) -> Dict[str, Any]:
@@ -1,13 +1,35 @@
 # smartgraph/tools/weather_toolkit.py
 
-from typing import Any, Dict, List
+from functools import cached_property
+from typing import Any, Dict, List, Optional
 
 from .base_toolkit import Toolkit
 
+_SCHEMAS: List[Dict[str, Any]] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_temperature",
+            "description": "Get the current temperature for a specific location",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {
+                        "type": "string",
+                        "description": "The city and country, e.g., 'London, UK'",
+                    }
+                },
+                "required": ["location"],
+            },
+        },
+    }
+]
+
 
 class WeatherToolkit(Toolkit):
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache_ttl: Optional[float] = 60.0):
         self._api_key = api_key
+        self.cache_ttl = cache_ttl
 
     @property
     def name(self) -> str:
@@ -17,31 +39,13 @@ class WeatherToolkit(Toolkit):
     def description(self) -> str:
         return "A toolkit for fetching weather information"
 
-    @property
+    @cached_property
     def functions(self) -> Dict[str, Any]:
         return {"get_temperature": self.get_temperature}
 
     @property
     def schemas(self) -> List[Dict[str, Any]]:
-        return [
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_temperature",
-                    "description": "Get the current temperature for a specific location",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "location": {
-                                "type": "string",
-                                "description": "The city and country, e.g., 'London, UK'",
-                            }
-                        },
-                        "required": ["location"],
-                    },
-                },
-            }
-        ]
+        return list(_SCHEMAS)
 
     async def get_temperature(self, location: str) -> Dict[str, Any]:
         # Simulated API call
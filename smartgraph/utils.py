@@ -1,38 +1,74 @@
 # smartgraph/utils.py
 
 import asyncio
-from typing import Any
+from typing import Any, AsyncIterator, Optional
 
 from reactivex import Observable
 
+_DONE = object()
 
-async def process_observable(observable: Observable) -> Any:
-    future = asyncio.Future()
 
-    def on_next(value):
-        if not future.done():
-            future.set_result(value)
+class _Error:
+    __slots__ = ("error",)
 
-    def on_error(error):
-        if not future.done():
-            future.set_exception(error)
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+async def iter_observable(observable: Observable) -> AsyncIterator[Any]:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
 
-    def on_completed():
-        if not future.done():
-            future.set_result(None)
+    subscription = observable.subscribe(
+        on_next=lambda value: loop.call_soon_threadsafe(queue.put_nowait, value),
+        on_error=lambda error: loop.call_soon_threadsafe(queue.put_nowait, _Error(error)),
+        on_completed=lambda: loop.call_soon_threadsafe(queue.put_nowait, _DONE),
+    )
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Error):
+                raise item.error
+            yield item
+    finally:
+        subscription.dispose()
 
-    observable.subscribe(on_next, on_error, on_completed)
 
-    return await future
+async def process_observable(observable: Observable) -> Any:
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(value: Any = None, error: Optional[Exception] = None) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    subscription = observable.subscribe(
+        on_next=lambda value: loop.call_soon_threadsafe(resolve, value),
+        on_error=lambda error: loop.call_soon_threadsafe(resolve, None, error),
+        on_completed=lambda: loop.call_soon_threadsafe(resolve),
+    )
+    try:
+        return await future
+    finally:
+        subscription.dispose()
 
 
-# This code defines an asynchronous function called `process_observable` that takes an Observable as input.
-# It creates an asyncio Future object to handle the asynchronous operation.
-# The function sets up three callback functions: on_next, on_error, and on_completed.
-# These callbacks are used to handle different events from the Observable:
-# - on_next: Sets the Future's result to the received value if the Future is not already done.
-# - on_error: Sets an exception on the Future if an error occurs and the Future is not already done.
-# - on_completed: Sets the Future's result to None if the Observable completes and the Future is not already done.
-# The Observable is then subscribed to using these callback functions.
-# Finally, the function awaits and returns the Future's result, effectively converting the Observable to an awaitable.
-# This allows asynchronous processing of the Observable's events in an asyncio-compatible way.
+# `iter_observable` bridges an Observable into an async iterator.
+# Every event is pushed onto an asyncio.Queue by the subscription callbacks, which hop onto
+# the loop with call_soon_threadsafe (asyncio.Queue is not thread-safe, and a consumer waiting
+# on it is only woken from the loop's thread); call_soon_threadsafe keeps events in order:
+# - on_next: enqueues the value, which the iterator yields in order.
+# - on_error: enqueues a wrapped error, which the iterator re-raises.
+# - on_completed: enqueues a sentinel that ends the iteration.
+# The subscription is disposed when the iterator finishes or is closed early, so no
+# references to the observer outlive the consumer.
+# `process_observable` returns the first value emitted, or None if the Observable completes
+# without emitting. It resolves a single future created on the running loop; callbacks hop onto
+# the loop with call_soon_threadsafe since schedulers may emit from other threads, and the
+# subscription is disposed as soon as the future settles.
@@ -0,0 +1,27 @@
+# tests/_fakes.py
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(slots=True)
+class FakeChoice:
+    message: Dict[str, Any]
+
+
+@dataclass(slots=True)
+class FakeCompletion:
+    """Minimal stand-in for the ModelResponse returned by litellm.acompletion."""
+
+    choices: List[FakeChoice] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class FakeToolkit:
+    """Plain-attribute stand-in for a Toolkit, without MagicMock's spec introspection."""
+
+    functions: Dict[str, Any] = field(default_factory=dict)
+    schemas: List[Dict[str, Any]] = field(default_factory=list)
+    name: str = "fake_toolkit"
+    description: str = "Toolkit used in tests"
+    cache_ttl: Optional[float] = None
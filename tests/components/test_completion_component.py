@@ -1,11 +1,16 @@
 # tests/test_completion_component.py
 
+import asyncio
+import json
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from smartgraph.components import CompletionComponent
-from smartgraph.tools.duckduckgo_toolkit import DuckDuckGoToolkit
+from smartgraph.exceptions import ConfigurationError
+from smartgraph.semantic_cache import SemanticCache
+from tests._fakes import FakeChoice, FakeCompletion, FakeToolkit
 
 
 @pytest.fixture
@@ -17,30 +22,32 @@ def mock_litellm():
 
 @pytest.fixture
 def mock_duckduckgo_toolkit():
-    toolkit = MagicMock(spec=DuckDuckGoToolkit)
-    toolkit.functions = {
-        "duckduckgo_search": AsyncMock(
-            return_value='{"results": [{"title": "Test", "body": "This is a test result"}]}'
-        )
-    }
-    toolkit.schemas = [
-        {
-            "type": "function",
-            "function": {
-                "name": "duckduckgo_search",
-                "description": "Search the web using DuckDuckGo",
-                "parameters": {
-                    "type": "object",
-                    "properties": {"query": {"type": "string", "description": "The search query"}},
-                    "required": ["query"],
+    return FakeToolkit(
+        name="duckduckgo",
+        functions={
+            "duckduckgo_search": AsyncMock(
+                return_value='{"results": [{"title": "Test", "body": "This is a test result"}]}'
+            )
+        },
+        schemas=[
+            {
+                "type": "function",
+                "function": {
+                    "name": "duckduckgo_search",
+                    "description": "Search the web using DuckDuckGo",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "query": {"type": "string", "description": "The search query"}
+                        },
+                        "required": ["query"],
+                    },
                 },
-            },
-        }
-    ]
-    return toolkit
+            }
+        ],
+    )
 
 
-@pytest.mark.asyncio
 async def test_initialization():
     assistant = CompletionComponent(
         name="TestAssistant",
@@ -61,14 +68,15 @@ async def test_initialization():
     }
 
 
-@pytest.mark.asyncio
 async def test_conversation_flow(mock_litellm):
     assistant = CompletionComponent(name="TestAssistant", model="gpt-3.5-turbo", api_key="test_key")
 
     mock_litellm.acompletion.side_effect = [
-        MagicMock(choices=[MagicMock(message={"content": "Hello! How can I help you today?"})]),
-        MagicMock(
-            choices=[MagicMock(message={"content": "The weather in New York is sunny today."})]
+        FakeCompletion(
+            choices=[FakeChoice(message={"content": "Hello! How can I help you today?"})]
+        ),
+        FakeCompletion(
+            choices=[FakeChoice(message={"content": "The weather in New York is sunny today."})]
         ),
     ]
 
@@ -92,7 +100,6 @@ async def test_conversation_flow(mock_litellm):
     )
 
 
-@pytest.mark.asyncio
 async def test_clear_conversation_history():
     assistant = CompletionComponent(
         name="TestAssistant",
@@ -124,7 +131,6 @@ async def test_clear_conversation_history():
     }
 
 
-@pytest.mark.asyncio
 async def test_set_system_context():
     assistant = CompletionComponent(
         name="TestAssistant",
@@ -141,7 +147,6 @@ async def test_set_system_context():
     assert assistant.conversation_history[0] == {"role": "system", "content": new_context}
 
 
-@pytest.mark.asyncio
 async def test_set_max_tokens():
     assistant = CompletionComponent(name="TestAssistant", model="gpt-3.5-turbo", api_key="test_key")
 
@@ -154,10 +159,9 @@ async def test_set_max_tokens():
     assert assistant.max_tokens != initial_max_tokens
 
 
-@pytest.mark.asyncio
 async def test_add_toolkit():
     assistant = CompletionComponent(name="TestAssistant", model="gpt-3.5-turbo", api_key="test_key")
-    mock_toolkit = MagicMock(spec=DuckDuckGoToolkit)
+    mock_toolkit = FakeToolkit()
 
     initial_toolkit_count = len(assistant.toolkits)
     assistant.add_toolkit(mock_toolkit)
@@ -166,7 +170,6 @@ async def test_add_toolkit():
     assert mock_toolkit in assistant.toolkits
 
 
-@pytest.mark.asyncio
 async def test_error_handling(mock_litellm):
     assistant = CompletionComponent(name="TestAssistant", model="gpt-3.5-turbo", api_key="test_key")
 
@@ -177,7 +180,6 @@ async def test_error_handling(mock_litellm):
     assert "API Error" in response["error"]
 
 
-@pytest.mark.asyncio
 async def test_streaming_mode(mock_litellm):
     assistant = CompletionComponent(
         name="TestAssistant", model="gpt-3.5-turbo", api_key="test_key", stream=True
@@ -200,7 +202,6 @@ async def test_streaming_mode(mock_litellm):
     assert full_response == "Hello world!"
 
 
-@pytest.mark.asyncio
 async def test_toolkit_integration(mock_litellm, mock_duckduckgo_toolkit):
     assistant = CompletionComponent(
         name="TestAssistant",
@@ -209,9 +210,9 @@ async def test_toolkit_integration(mock_litellm, mock_duckduckgo_toolkit):
     )
 
     mock_litellm.acompletion.side_effect = [
-        MagicMock(
+        FakeCompletion(
             choices=[
-                MagicMock(
+                FakeChoice(
                     message={
                         "content": None,
                         "tool_calls": [
@@ -228,9 +229,9 @@ async def test_toolkit_integration(mock_litellm, mock_duckduckgo_toolkit):
                 )
             ]
         ),
-        MagicMock(
+        FakeCompletion(
             choices=[
-                MagicMock(
+                FakeChoice(
                     message={
                         "content": "Python is a high-level, interpreted programming language known for its simplicity and readability."
                     }
@@ -247,7 +248,6 @@ async def test_toolkit_integration(mock_litellm, mock_duckduckgo_toolkit):
     )
 
 
-@pytest.mark.asyncio
 async def test_prepare_messages():
     assistant = CompletionComponent(
         name="TestAssistant",
@@ -271,3 +271,376 @@ async def test_prepare_messages():
     assert messages[1] == {"role": "user", "content": "Hello"}
     assert messages[2] == {"role": "assistant", "content": "Hi there!"}
     assert messages[3] == {"role": "user", "content": "How are you?"}
+
+
+async def test_tool_schemas_passed_to_llm(mock_litellm, mock_duckduckgo_toolkit):
+    assistant = CompletionComponent(name="TestAssistant", model="gpt-3.5-turbo")
+    assistant.add_toolkit(mock_duckduckgo_toolkit)
+
+    mock_litellm.acompletion.side_effect = [
+        FakeCompletion(choices=[FakeChoice(message={"content": "Hello!"})]),
+    ]
+
+    await assistant.process({"message": "Hi"})
+
+    call_kwargs = mock_litellm.acompletion.call_args[1]
+    assert call_kwargs["tools"] == mock_duckduckgo_toolkit.schemas
+    assert call_kwargs["tool_choice"] == "auto"
+
+
+async def test_user_turn_sent_once_and_rolled_back_on_error(mock_litellm):
+    assistant = CompletionComponent(name="TestAssistant", model="gpt-3.5-turbo")
+
+    mock_litellm.acompletion.side_effect = [
+        FakeCompletion(choices=[FakeChoice(message={"content": "Hello!"})]),
+        Exception("API Error"),
+    ]
+
+    await assistant.process({"message": "Hi"})
+    sent = mock_litellm.acompletion.call_args[1]["messages"]
+    assert [m["role"] for m in sent] == ["system", "user"]
+
+    response = await assistant.process({"message": "This should cause an error"})
+    assert "error" in response
+    assert [m["content"] for m in assistant.conversation_history[1:]] == ["Hi", "Hello!"]
+
+
+async def test_prompt_cache_marker_for_anthropic_models(mock_litellm):
+    assistant = CompletionComponent(
+        name="TestAssistant",
+        model="claude-3-5-sonnet-20240620",
+        system_context="You are a helpful assistant.",
+    )
+    mock_litellm.acompletion.side_effect = [
+        FakeCompletion(choices=[FakeChoice(message={"content": "Hello!"})]),
+    ]
+
+    await assistant.process({"message": "Hi"})
+
+    system_message = mock_litellm.acompletion.call_args[1]["messages"][0]
+    assert system_message["content"] == [
+        {
+            "type": "text",
+            "text": "You are a helpful assistant.",
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+    assert assistant.conversation_history[0] == {
+        "role": "system",
+        "content": "You are a helpful assistant.",
+    }
+
+
+async def test_response_cache_skips_llm_call(mock_litellm):
+    async def embed(text):
+        return [1.0, 0.0]
+
+    assistant = CompletionComponent(
+        name="TestAssistant",
+        model="gpt-3.5-turbo",
+        response_cache=SemanticCache(embed_fn=embed),
+    )
+    mock_litellm.acompletion.side_effect = [
+        FakeCompletion(choices=[FakeChoice(message={"content": "Hello!"})]),
+        FakeCompletion(choices=[FakeChoice(message={"content": "Hello again!"})]),
+    ]
+
+    response1 = await assistant.process({"message": "Hi"})
+    assistant.clear_conversation_history()
+    response2 = await assistant.process({"message": "Hi!"})
+
+    assert response1 == response2 == {"ai_response": "Hello!"}
+    assert mock_litellm.acompletion.call_count == 1
+    assert len(assistant.conversation_history) == 3
+
+    # The same question later in the conversation follows different turns and is not reused
+    response3 = await assistant.process({"message": "Hi"})
+
+    assert response3 == {"ai_response": "Hello again!"}
+    assert mock_litellm.acompletion.call_count == 2
+
+
+async def test_tool_results_cached_within_ttl(mock_duckduckgo_toolkit):
+    mock_duckduckgo_toolkit.cache_ttl = 60.0
+    assistant = CompletionComponent(
+        name="TestAssistant", model="gpt-3.5-turbo", toolkits=[mock_duckduckgo_toolkit]
+    )
+    search = mock_duckduckgo_toolkit.functions["duckduckgo_search"]
+
+    first = await assistant._execute_tool("duckduckgo_search", {"query": "Python"})
+    second = await assistant._execute_tool("duckduckgo_search", {"query": "Python"})
+    await assistant._execute_tool("duckduckgo_search", {"query": "Rust"})
+
+    assert first == second
+    assert search.call_count == 2
+
+
+async def test_overlapping_calls_keep_history_consistent(mock_litellm):
+    assistant = CompletionComponent(name="TestAssistant", model="gpt-3.5-turbo")
+    b_done = asyncio.Event()
+
+    async def fake_completion(**params):
+        content = params["messages"][-1]["content"]
+        if content == "A":
+            await b_done.wait()
+            raise Exception("API Error")
+        return FakeCompletion(choices=[FakeChoice(message={"content": "answer B"})])
+
+    mock_litellm.acompletion.side_effect = fake_completion
+
+    call_a = asyncio.ensure_future(assistant.process({"message": "A"}))
+    await asyncio.sleep(0)
+    assert await assistant.process({"message": "B"}) == {"ai_response": "answer B"}
+    b_done.set()
+
+    assert await call_a == {"error": "API Error"}
+    assert assistant.conversation_history[1:] == [
+        {"role": "user", "content": "B"},
+        {"role": "assistant", "content": "answer B"},
+    ]
+
+
+async def test_process_many(mock_litellm):
+    assistant = CompletionComponent(name="TestAssistant", model="gpt-3.5-turbo")
+
+    async def fake_completion(**params):
+        content = params["messages"][-1]["content"]
+        if content == "fail":
+            raise Exception("API Error")
+        return FakeCompletion(choices=[FakeChoice(message={"content": content.upper()})])
+
+    mock_litellm.acompletion.side_effect = fake_completion
+
+    results = await assistant.process_many(
+        [{"content": "a"}, {"message": "fail"}, {"content": "b"}, {}], max_concurrency=2
+    )
+
+    assert results[0] == {"ai_response": "A"}
+    assert results[1] == {"error": "API Error"}
+    assert results[2] == {"ai_response": "B"}
+    assert "error" in results[3]
+    assert len(assistant.conversation_history) == 1
+
+
+async def test_parallel_tool_calls(mock_litellm, mock_duckduckgo_toolkit):
+    started = asyncio.Event()
+    in_flight = 0
+
+    async def search(query):
+        nonlocal in_flight
+        in_flight += 1
+        if in_flight == 2:
+            started.set()
+        await asyncio.wait_for(started.wait(), timeout=1)
+        return f"results for {query}"
+
+    mock_duckduckgo_toolkit.functions = {"duckduckgo_search": search}
+    assistant = CompletionComponent(
+        name="TestAssistant", model="gpt-3.5-turbo", toolkits=[mock_duckduckgo_toolkit]
+    )
+    tool_calls = [
+        {
+            "id": f"call_{i}",
+            "type": "function",
+            "function": {"name": "duckduckgo_search", "arguments": f'{{"query": "q{i}"}}'},
+        }
+        for i in range(2)
+    ]
+    mock_litellm.acompletion.side_effect = [
+        FakeCompletion(choices=[FakeChoice(message={"content": None, "tool_calls": tool_calls})]),
+        FakeCompletion(choices=[FakeChoice(message={"content": "done"})]),
+    ]
+
+    response = await assistant.process({"message": "Search twice"})
+
+    assert response == {"ai_response": "done"}
+    tool_messages = mock_litellm.acompletion.call_args.kwargs["messages"][-2:]
+    assert [m["tool_call_id"] for m in tool_messages] == ["call_0", "call_1"]
+    assert tool_messages[1]["content"] == '"results for q1"'
+
+
+async def test_batch_api_submission(mock_litellm):
+    assistant = CompletionComponent(name="TestAssistant", model="gpt-4o-mini", api_key="test_key")
+    mock_litellm.get_llm_provider.return_value = ("gpt-4o-mini", "openai", None, None)
+    mock_litellm.acreate_file = AsyncMock(return_value=SimpleNamespace(id="file_1"))
+    mock_litellm.acreate_batch = AsyncMock(return_value=SimpleNamespace(id="batch_1"))
+    mock_litellm.aretrieve_batch = AsyncMock(
+        side_effect=[
+            SimpleNamespace(
+                status="in_progress", request_counts=SimpleNamespace(completed=1, failed=0)
+            ),
+            SimpleNamespace(
+                status="completed",
+                request_counts=SimpleNamespace(completed=1, failed=1),
+                output_file_id="file_2",
+                error_file_id="file_3",
+            ),
+        ]
+    )
+    files = {
+        "file_2": [
+            {
+                "custom_id": "0",
+                "response": {
+                    "status_code": 200,
+                    "body": {"choices": [{"message": {"content": "Answer"}}]},
+                },
+            }
+        ],
+        "file_3": [
+            {
+                "custom_id": "1",
+                "response": {"status_code": 400, "body": {"error": {"message": "bad"}}},
+            }
+        ],
+    }
+
+    async def file_content(file_id, **kwargs):
+        return SimpleNamespace(text="\n".join(json.dumps(line) for line in files[file_id]))
+
+    mock_litellm.afile_content = AsyncMock(side_effect=file_content)
+    progress = []
+
+    handle = await assistant.submit_batch([{"content": "Q0"}, {"content": "Q1"}, {"content": "Q2"}])
+    results = await assistant.await_batch(
+        handle, poll_interval=0, on_progress=lambda done, total: progress.append(done)
+    )
+
+    assert handle.batch_id == "batch_1"
+    assert results[0] == {"ai_response": "Answer"}
+    assert "bad" in results[1]["error"]
+    assert results[2] == {"error": "No result returned for this input"}
+    assert progress == [1, 2]
+    upload = mock_litellm.acreate_file.call_args.kwargs
+    assert upload["api_key"] == "test_key"
+    first_request = json.loads(upload["file"][1].decode().splitlines()[0])
+    assert first_request["body"]["messages"][-1] == {"role": "user", "content": "Q0"}
+    assert "api_key" not in first_request["body"]
+
+
+async def test_batch_falls_back_to_process_many_with_toolkits(
+    mock_litellm, mock_duckduckgo_toolkit
+):
+    assistant = CompletionComponent(
+        name="TestAssistant", model="gpt-4o-mini", toolkits=[mock_duckduckgo_toolkit]
+    )
+    mock_litellm.acompletion.return_value = FakeCompletion(
+        choices=[FakeChoice(message={"content": "Hi"})]
+    )
+
+    handle = await assistant.submit_batch([{"content": "Hello"}])
+
+    assert handle.batch_id is None
+    assert await assistant.await_batch(handle) == [{"ai_response": "Hi"}]
+
+
+async def test_rate_limiter_wraps_llm_calls(mock_litellm):
+    limiter = MagicMock()
+    limiter.__aenter__ = AsyncMock()
+    limiter.__aexit__ = AsyncMock(return_value=None)
+    assistant = CompletionComponent(
+        name="TestAssistant", model="gpt-3.5-turbo", rate_limiter=limiter
+    )
+    mock_litellm.acompletion.return_value = FakeCompletion(
+        choices=[FakeChoice(message={"content": "Hi"})]
+    )
+
+    await assistant.process({"message": "Hello"})
+
+    limiter.__aenter__.assert_awaited_once()
+
+
+async def test_stateful_mode_sends_only_new_turn(mock_litellm):
+    assistant = CompletionComponent(
+        name="TestAssistant", model="gpt-4o", system_context="Be brief.", stateful=True
+    )
+    mock_litellm.aresponses = AsyncMock(
+        side_effect=[
+            SimpleNamespace(id="resp_1", output_text="Hello!"),
+            SimpleNamespace(
+                id="resp_2",
+                output_text=None,
+                output=[{"type": "message", "content": [{"type": "output_text", "text": "Fine."}]}],
+            ),
+        ]
+    )
+
+    assert await assistant.process({"message": "Hi"}) == {"ai_response": "Hello!"}
+    assert await assistant.process({"message": "How are you?"}) == {"ai_response": "Fine."}
+
+    second_call = mock_litellm.aresponses.call_args.kwargs
+    assert second_call["input"] == [{"role": "user", "content": "How are you?"}]
+    assert second_call["previous_response_id"] == "resp_1"
+    assert second_call["instructions"] == "Be brief."
+    mock_litellm.acompletion.assert_not_called()
+    assert len(assistant.get_conversation_history()) == 5
+
+
+def test_stateful_mode_rejects_toolkits(mock_litellm, mock_duckduckgo_toolkit):
+    with pytest.raises(ConfigurationError):
+        CompletionComponent(
+            name="TestAssistant",
+            model="gpt-4o",
+            stateful=True,
+            toolkits=[mock_duckduckgo_toolkit],
+        )
+
+
+async def test_history_is_unbounded_by_default(mock_litellm):
+    assistant = CompletionComponent(name="TestAssistant", model="gpt-4o")
+    mock_litellm.acompletion.return_value = FakeCompletion(
+        choices=[FakeChoice(message={"content": "ok"})]
+    )
+
+    for turn in range(25):
+        await assistant.process({"message": f"turn {turn}"})
+
+    assert len(assistant.get_conversation_history()) == 1 + 2 * 25
+
+
+async def test_history_window_drops_old_turns(mock_litellm):
+    assistant = CompletionComponent(name="TestAssistant", model="gpt-4o", max_history_turns=1)
+    mock_litellm.acompletion.return_value = FakeCompletion(
+        choices=[FakeChoice(message={"content": "ok"})]
+    )
+
+    for message in ("one", "two", "three"):
+        await assistant.process({"message": message})
+
+    history = assistant.get_conversation_history()
+    assert [m["content"] for m in history[1:]] == ["two", "ok", "three", "ok"]
+
+
+async def test_history_window_summarizes_old_turns(mock_litellm):
+    assistant = CompletionComponent(
+        name="TestAssistant", model="gpt-4o", max_history_turns=1, summary_model="gpt-4o-mini"
+    )
+
+    async def fake_completion(**params):
+        if params["model"] == "gpt-4o-mini":
+            return FakeCompletion(choices=[FakeChoice(message={"content": "user said one"})])
+        return FakeCompletion(choices=[FakeChoice(message={"content": "ok"})])
+
+    mock_litellm.acompletion.side_effect = fake_completion
+
+    for message in ("one", "two", "three"):
+        await assistant.process({"message": message})
+
+    history = assistant.get_conversation_history()
+    assert history[1] == {
+        "role": "system",
+        "content": "Summary of the earlier conversation: user said one",
+    }
+    assert [m["content"] for m in history[2:]] == ["two", "ok", "three", "ok"]
+
+
+def test_tool_functions_view_is_read_only(mock_duckduckgo_toolkit):
+    assistant = CompletionComponent(
+        name="TestAssistant", model="gpt-3.5-turbo", toolkits=[mock_duckduckgo_toolkit]
+    )
+
+    functions = assistant.tool_functions
+
+    assert list(functions) == ["duckduckgo_search"]
+    with pytest.raises(TypeError):
+        functions["other"] = None
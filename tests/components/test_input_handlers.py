@@ -1,10 +1,15 @@
+import asyncio
 import json
 from io import BytesIO
+from unittest.mock import AsyncMock, patch
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 import yaml
+from lxml import etree
 
+from smartgraph.components import input_handlers
 from smartgraph.components.input_handlers import (
     CommandLineInputHandler,
     CSVInputHandler,
@@ -12,13 +17,19 @@ from smartgraph.components.input_handlers import (
     ImageUploadHandler,
     JSONInputHandler,
     ParquetInputHandler,
+    StructuredDataDetector,
     TextInputHandler,
     XMLInputHandler,
     YAMLInputHandler,
 )
 
 
-@pytest.mark.asyncio
+def _parquet_buffer(columns):
+    buffer = BytesIO()
+    pq.write_table(pa.table(columns), buffer)
+    return buffer
+
+
 async def test_text_input_handler():
     handler = TextInputHandler("TextInput")
     result = await handler.process("Hello, world!")
@@ -31,7 +42,6 @@ async def test_text_input_handler():
     }
 
 
-@pytest.mark.asyncio
 async def test_json_input_handler():
     handler = JSONInputHandler("JSONInput")
     input_data = json.dumps({"key": "value", "number": 42})
@@ -43,7 +53,13 @@ async def test_json_input_handler():
     }
 
 
-@pytest.mark.asyncio
+async def test_json_input_handler_bytes():
+    handler = JSONInputHandler("JSONInput")
+    result = await handler.process(b'{"key": "value", "list": [1, 2]}')
+
+    assert result == {"type": "json", "parsed_data": {"key": "value", "list": [1, 2]}}
+
+
 async def test_json_input_handler_error():
     handler = JSONInputHandler("JSONInput")
     input_data = "This is not valid JSON"
@@ -54,7 +70,6 @@ async def test_json_input_handler_error():
     assert "Failed to parse JSON" in result["error"]
 
 
-@pytest.mark.asyncio
 async def test_command_line_input_handler():
     handler = CommandLineInputHandler("CLIInput")
     input_data = 'echo "Hello, world!"'
@@ -68,7 +83,20 @@ async def test_command_line_input_handler():
     }
 
 
-@pytest.mark.asyncio
+async def test_command_line_input_handler_quoting():
+    handler = CommandLineInputHandler("CLIInput")
+    result = await handler.process('git commit -m \'it"s done\' --author="A B" "unterminated arg')
+
+    assert result["command"] == "git"
+    assert result["args"] == [
+        "commit",
+        "-m",
+        "'it\"s done'",
+        '--author="A B"',
+        '"unterminated arg',
+    ]
+
+
 async def test_xml_input_handler():
     handler = XMLInputHandler("XMLInput")
     input_data = "<root><key>value</key></root>"
@@ -80,7 +108,58 @@ async def test_xml_input_handler():
     }
 
 
-@pytest.mark.asyncio
+async def test_xml_input_handler_ignores_comments_and_entities():
+    handler = XMLInputHandler("XMLInput")
+    input_data = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<!DOCTYPE root [<!ENTITY secret SYSTEM "file:///etc/passwd">]>'
+        "<root><!-- note --><key>&secret;</key><nested><item>data</item></nested></root>"
+    )
+    result = await handler.process(input_data)
+
+    assert "parsed_data" not in result
+    assert "secret" in result["error"]
+
+
+async def test_xml_input_handler_expands_internal_entities():
+    handler = XMLInputHandler("XMLInput")
+    input_data = (
+        '<!DOCTYPE root [<!ENTITY greeting "hello">]>'
+        "<root><!-- note --><key>&greeting;</key></root>"
+    )
+    result = await handler.process(input_data)
+
+    assert result["parsed_data"] == {"root": {"key": "hello"}}
+
+
+@pytest.mark.parametrize("padding", [0, 70_000])
+async def test_xml_input_handler_str_ignores_declared_encoding(padding):
+    handler = XMLInputHandler("XMLInput")
+    input_data = (
+        '<?xml version="1.0" encoding="ISO-8859-1"?>'
+        f"<root><key>café</key><pad>{'x' * padding}</pad></root>"
+    )
+    result = await handler.process(input_data)
+
+    assert result["parsed_data"]["root"]["key"] == "café"
+
+
+async def test_xml_input_handler_streams_large_documents():
+    handler = XMLInputHandler("XMLInput")
+    items = "".join(
+        f"<item{i}><name>n{i}</name><!-- c --><v>{i}</v></item{i}>" for i in range(5000)
+    )
+    input_data = f"<root><empty/>{items}<nested><leaf>x</leaf></nested></root>"
+    assert len(input_data) > input_handlers._XML_STREAMING_THRESHOLD
+
+    result = await handler.process(input_data)
+
+    root = input_handlers._element_to_dict(etree.fromstring(input_data.encode()))
+    assert result["parsed_data"] == {"root": root}
+    assert result["parsed_data"]["root"]["item4999"] == {"name": "n4999", "v": "4999"}
+    assert result["parsed_data"]["root"]["empty"] is None
+
+
 async def test_yaml_input_handler():
     handler = YAMLInputHandler("YAMLInput")
     input_data = yaml.dump({"key": "value", "nested": {"item": "data"}})
@@ -92,24 +171,70 @@ async def test_yaml_input_handler():
     }
 
 
-@pytest.mark.asyncio
 async def test_parquet_input_handler():
     handler = ParquetInputHandler("ParquetInput")
-    df = pd.DataFrame({"A": [1, 2, 3], "B": ["a", "b", "c"]})
-    parquet_buffer = BytesIO()
-    df.to_parquet(parquet_buffer)
-    parquet_buffer.seek(0)
+    parquet_buffer = _parquet_buffer({"A": [1, 2, 3], "B": ["a", "b", "c"]})
 
     result = await handler.process(parquet_buffer.getvalue())
 
     assert result["type"] == "parquet"
     assert "parsed_data" in result
     assert len(result["parsed_data"]) == 3
-    assert "num_rows" in result
-    assert "num_columns" in result
+    assert result["parsed_data"][0] == {"A": 1, "B": "a"}
+    assert result["num_rows"] == 3
+    assert result["num_columns"] == 2
+
+
+async def test_parquet_input_handler_batches():
+    handler = ParquetInputHandler("ParquetInput", batch_size=2)
+    parquet_buffer = _parquet_buffer({"A": list(range(5))})
+
+    result = await handler.process(parquet_buffer.getvalue())
+
+    assert [row["A"] for row in result["parsed_data"]] == [0, 1, 2, 3, 4]
+    assert result["num_rows"] == 5
+
+
+@pytest.mark.parametrize("output", ["rows", "columnar"])
+async def test_parquet_input_handler_prefetches_large_inputs(output):
+    handler = ParquetInputHandler("ParquetInput", batch_size=1000, output=output)
+    parquet_buffer = _parquet_buffer({"A": list(range(20_000))})
+    assert parquet_buffer.getbuffer().nbytes > input_handlers._THREAD_OFFLOAD_THRESHOLD
+
+    with patch.object(
+        input_handlers, "_consume_prefetched", wraps=input_handlers._consume_prefetched
+    ) as consume_prefetched:
+        result = await handler.process(parquet_buffer.getvalue())
+
+    consume_prefetched.assert_awaited_once()
+    values = result["parsed_data"]["A"] if output == "columnar" else result["parsed_data"]
+    assert values == (
+        list(range(20_000)) if output == "columnar" else [{"A": i} for i in range(20_000)]
+    )
+
+
+async def test_prefetched_batch_is_awaited_when_consuming_fails():
+    def fail(batch):
+        raise ValueError("bad batch")
+
+    with pytest.raises(ValueError, match="bad batch"):
+        await input_handlers._consume_prefetched(iter([1, 2, 3]), fail)
+
+    # The decode started for the next batch has finished and nothing is left running
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+async def test_parquet_input_handler_buffer_types():
+    handler = ParquetInputHandler("ParquetInput")
+    parquet_buffer = _parquet_buffer({"A": [1, 2]})
+
+    from_memoryview = await handler.process(memoryview(parquet_buffer.getvalue()))
+    from_bytes_io = await handler.process(parquet_buffer)
+
+    assert from_memoryview["parsed_data"] == [{"A": 1}, {"A": 2}]
+    assert from_bytes_io["parsed_data"] == [{"A": 1}, {"A": 2}]
 
 
-@pytest.mark.asyncio
 async def test_csv_input_handler():
     handler = CSVInputHandler("CSVInput")
     input_data = "A,B\n1,a\n2,b\n3,c"
@@ -122,7 +247,87 @@ async def test_csv_input_handler():
     }
 
 
-@pytest.mark.asyncio
+async def test_csv_input_handler_keeps_strings():
+    handler = CSVInputHandler("CSVInput")
+    input_data = 'name,note\n"Smith, J",\n007,"said ""hi"""\n'
+    result = await handler.process(input_data)
+
+    assert result["parsed_data"] == [
+        {"name": "Smith, J", "note": ""},
+        {"name": "007", "note": 'said "hi"'},
+    ]
+    assert result["headers"] == ["name", "note"]
+
+
+async def test_csv_input_handler_bytes():
+    handler = CSVInputHandler("CSVInput")
+    result = await handler.process("Name,City\nZoë,Köln\r\n".encode())
+
+    assert result["parsed_data"] == [{"Name": "Zoë", "City": "Köln"}]
+    assert result["headers"] == ["Name", "City"]
+
+
+async def test_csv_input_handler_strips_byte_order_mark():
+    handler = CSVInputHandler("CSVInput")
+
+    from_str = await handler.process("\ufeffA,B\n1,2\n")
+    from_bytes = await handler.process("\ufeffA,B\n1,2\n".encode())
+
+    assert from_str["parsed_data"] == from_bytes["parsed_data"] == [{"A": "1", "B": "2"}]
+    assert from_str["headers"] == ["A", "B"]
+
+
+async def test_csv_input_handler_ragged_rows():
+    handler = CSVInputHandler("CSVInput")
+
+    result = await handler.process("a,b\n1,2,3\n4\n")
+
+    assert result == {
+        "type": "csv",
+        "parsed_data": [{"a": "1", "b": "2", None: ["3"]}, {"a": "4", "b": None}],
+        "headers": ["a", "b"],
+    }
+
+
+async def test_csv_input_handler_multiline_quoted_header():
+    handler = CSVInputHandler("CSVInput")
+    input_data = 'id,"first\nsecond",note\n007,1,"a\n"\n'
+
+    result = await handler.process(input_data)
+    from_bytes = await handler.process(input_data.encode())
+
+    assert result["headers"] == ["id", "first\nsecond", "note"]
+    assert result["parsed_data"] == from_bytes["parsed_data"]
+    assert result["parsed_data"] == [{"id": "007", "first\nsecond": "1", "note": "a\n"}]
+
+
+async def test_csv_input_handler_with_schema():
+    handler = CSVInputHandler("CSVInput", schema=["id", "name"])
+    result = await handler.process("id,name\n007,Bond\n")
+
+    assert result["parsed_data"] == [{"id": "007", "name": "Bond"}]
+    assert result["headers"] == ["id", "name"]
+
+    mismatch = await handler.process("id,title\n1,x\n")
+    assert "do not match the schema" in mismatch["error"]
+
+
+async def test_csv_input_handler_parses_large_input_off_loop():
+    handler = CSVInputHandler("CSVInput")
+    rows = "".join(f"{i},name{i}\n" for i in range(10000))
+    input_data = f"id,name\n{rows}"
+    assert len(input_data) > input_handlers._THREAD_OFFLOAD_THRESHOLD
+
+    with patch.object(asyncio, "to_thread", wraps=asyncio.to_thread) as to_thread:
+        result = await handler.process(input_data)
+        small = await handler.process("id,name\n1,a\n")
+
+    to_thread.assert_called_once()
+    assert len(result["parsed_data"]) == 10000
+    assert result["parsed_data"][-1] == {"id": "9999", "name": "name9999"}
+    assert small["parsed_data"] == [{"id": "1", "name": "a"}]
+
+
 async def test_file_upload_handler():
     handler = FileUploadHandler("FileUpload", allowed_extensions=[".txt"])
     input_data = {"filename": "test.txt", "content": b"This is a test file content"}
@@ -136,7 +341,14 @@ async def test_file_upload_handler():
     }
 
 
-@pytest.mark.asyncio
+async def test_file_upload_handler_rejects_unlisted_extensions():
+    handler = FileUploadHandler("FileUpload", allowed_extensions=[".txt", ".md"])
+
+    assert (await handler.process({"filename": "notes.md", "content": b""}))["type"] == "file"
+    result = await handler.process({"filename": "script.py", "content": b""})
+    assert "Unsupported file type. Allowed types: .txt, .md" in result["error"]
+
+
 async def test_image_upload_handler():
     handler = ImageUploadHandler("ImageUpload")
     input_data = {"filename": "test.jpg", "content": b"fake image data"}
@@ -147,3 +359,44 @@ async def test_image_upload_handler():
     assert result["content"] == b"fake image data"
     assert "dimensions" in result
     assert "format" in result
+
+
+async def test_structured_data_detector():
+    detector = StructuredDataDetector("Detector")
+
+    assert set(detector.handlers) == {"json", "xml", "csv", "yaml", "parquet"}
+    assert (await detector.process('{"key": "value"}'))["parsed_data"] == {"key": "value"}
+    assert (await detector.process("<root><key>value</key></root>"))["type"] == "xml"
+    assert (await detector.process("  [1, 2]\n"))["parsed_data"] == [1, 2]
+    assert (await detector.process(b"not parquet"))["type"] == "unknown"
+    parquet_buffer = _parquet_buffer({"A": [1]})
+    assert (await detector.process(parquet_buffer.getvalue()))["parsed_data"] == [{"A": 1}]
+    assert (await detector.process("plain text"))["type"] == "unknown"
+
+
+async def test_input_handler_result_cache():
+    handler = JSONInputHandler("JSONInput", cache_size=1)
+    handler._handle_input = AsyncMock(wraps=handler._handle_input)
+
+    first = await handler.process('{"a": 1}')
+    second = await handler.process('{"a": 1}')
+    await handler.process('{"b": 2}')
+    await handler.process('{"a": 1}')
+
+    assert first == second == {"type": "json", "parsed_data": {"a": 1}}
+    assert first is not second
+    assert handler._handle_input.await_count == 3
+
+
+async def test_columnar_output():
+    csv_handler = CSVInputHandler("CSVInput", output="columnar")
+    parquet_handler = ParquetInputHandler("ParquetInput", batch_size=2, output="columnar")
+    parquet_buffer = _parquet_buffer({"A": [1, 2, 3], "B": ["a", "b", "c"]})
+
+    csv_result = await csv_handler.process("A,B\n1,a\n2,b\n3,c")
+    parquet_result = await parquet_handler.process(parquet_buffer.getvalue())
+
+    assert csv_result["parsed_data"] == {"A": ["1", "2", "3"], "B": ["a", "b", "c"]}
+    assert parquet_result["parsed_data"] == {"A": [1, 2, 3], "B": ["a", "b", "c"]}
+    with pytest.raises(ValueError):
+        CSVInputHandler("CSVInput", output="tabular")
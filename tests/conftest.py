@@ -1,13 +1,48 @@
+import asyncio
+
 import pytest
 
 from smartgraph.logging import SmartGraphLogger
 
+try:
+    import uvloop
+except ImportError:  # not available on Windows
+    uvloop = None
+
+
+def pytest_asyncio_loop_factories(config, item):
+    # Run async tests on uvloop where it is installed
+    if uvloop is None:
+        return {"asyncio": asyncio.new_event_loop}
+    return {"uvloop": uvloop.new_event_loop}
+
+
+@pytest.fixture
+def aio_benchmark(benchmark):
+    # pytest-benchmark times plain callables, so each round drives the coroutine on a
+    # dedicated loop. Benchmarks are synchronous tests and deselected unless run with
+    # `pytest -m benchmark`.
+    with asyncio.Runner() as runner:
+
+        def run(func, *args, **kwargs):
+            return benchmark(lambda: runner.run(func(*args, **kwargs)))
+
+        yield run
+
 
-@pytest.fixture(autouse=True)
+@pytest.fixture(autouse=True, scope="session")
+def quiet_logger():
+    # Rendering every DEBUG record through the Rich handler is wasted work for tests that
+    # never look at the logs; tests that do request setup_logger.
+    SmartGraphLogger.get_logger().set_level("WARNING")
+
+
+@pytest.fixture
 def setup_logger():
     logger = SmartGraphLogger.get_logger()
     logger.set_level("DEBUG")
-    return logger
+    yield logger
+    logger.set_level("WARNING")
 
 
 @pytest.fixture
@@ -0,0 +1,90 @@
+# tests/test_core.py
+
+import asyncio
+
+from smartgraph.core import ReactiveComponent, ReactiveSmartGraph
+
+
+class SimpleComponent(ReactiveComponent):
+    async def process(self, input_data):
+        return input_data * 2
+
+
+class DelayComponent(ReactiveComponent):
+    async def process(self, input_data):
+        await asyncio.sleep(input_data)
+        if input_data < 0:
+            raise ValueError("negative delay")
+        return input_data
+
+
+class SyncComponent(ReactiveComponent):
+    def process(self, input_data):
+        return input_data + 1
+
+
+class TestReactiveSmartGraph:
+    async def test_execute_mixed_components(self):
+        graph = ReactiveSmartGraph()
+        pipeline = graph.create_pipeline("main")
+        pipeline.add_component(SimpleComponent("double"))
+        pipeline.add_component(SyncComponent("increment"))
+        graph.compile()
+
+        result = await graph.execute_and_await("main", 5)
+
+        assert result == 11
+
+    async def test_recompile_picks_up_new_components(self):
+        graph = ReactiveSmartGraph()
+        pipeline = graph.create_pipeline("main")
+        pipeline.add_component(SimpleComponent("double"))
+        graph.compile()
+        assert await graph.execute_and_await("main", 3) == 6
+
+        pipeline.add_component(SyncComponent("increment"))
+        graph.compile()
+
+        assert await graph.execute_and_await("main", 3) == 7
+
+
+class TestReactiveComponentAsync:
+    async def test_async_process_emits_awaited_values(self):
+        component = SimpleComponent("double")
+        results = []
+        component.output.subscribe(results.append)
+
+        component.input.on_next(2)
+        component.input.on_next(5)
+        await asyncio.sleep(0.01)
+
+        assert results == [4, 10]
+
+    async def test_async_results_keep_input_order(self):
+        component = DelayComponent("delay")
+        results, errors = [], []
+        component.output.subscribe(results.append)
+        component.error.subscribe(errors.append)
+
+        component.input.on_next(0.05)
+        component.input.on_next(-0.01)
+        component.input.on_next(0)
+        await asyncio.sleep(0.02)
+
+        # The later inputs have finished but wait for the first one
+        assert results == errors == []
+
+        await asyncio.sleep(0.06)
+
+        assert results == [0.05, 0]
+        assert [str(error) for error in errors] == ["negative delay"]
+        assert not component._pending
+
+    def test_async_process_without_running_loop_emits_awaited_values(self):
+        component = SimpleComponent("double")
+        results = []
+        component.output.subscribe(results.append)
+
+        component.input.on_next(2)
+
+        assert results == [4]
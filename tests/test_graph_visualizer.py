@@ -0,0 +1,46 @@
+# tests/test_graph_visualizer.py
+
+import pytest
+
+from smartgraph.core import ReactiveComponent, ReactiveSmartGraph
+from smartgraph.graph_visualizer import GraphVisualizer
+
+
+class MockComponent(ReactiveComponent):
+    async def process(self, input_data):
+        return input_data
+
+
+def create_mock_graph() -> ReactiveSmartGraph:
+    graph = ReactiveSmartGraph()
+    main = graph.create_pipeline("main")
+    main.add_component(MockComponent("input"))
+    main.add_component(MockComponent("output"))
+    side = graph.create_pipeline("side")
+    side.add_component(MockComponent("logger"))
+    graph.connect_components("main", "output", "side", "logger")
+    return graph
+
+
+@pytest.fixture(scope="module")
+def mock_graph():
+    return create_mock_graph()
+
+
+def test_generate_mermaid_code(mock_graph):
+    code = GraphVisualizer(mock_graph).generate_mermaid_code()
+
+    assert code.startswith("```mermaid\ngraph TD\n")
+    assert "subgraph main\n" in code
+    assert "main_input[input]\n" in code
+    assert "main_input --> main_output\n" in code
+    assert "main_output --> side_logger\n" in code
+
+
+def test_save_mermaid_code(mock_graph, tmp_path):
+    out = tmp_path / "graph.md"
+    visualizer = GraphVisualizer(mock_graph)
+
+    visualizer.save_mermaid_code(str(out))
+
+    assert out.read_text() == visualizer.generate_mermaid_code()
@@ -0,0 +1,43 @@
+# tests/test_http.py
+
+import litellm
+import pytest
+
+from smartgraph.components import CompletionComponent
+from smartgraph.http import install, shared_async_client, shutdown
+
+
+@pytest.fixture(autouse=True)
+async def close_shared_client():
+    yield
+    await shutdown()
+
+
+async def test_shared_async_client_is_reused_until_shutdown():
+    client = shared_async_client()
+    assert shared_async_client() is client
+
+    await shutdown()
+
+    assert client.is_closed
+    new_client = shared_async_client()
+    assert new_client is not client
+
+
+async def test_components_leave_litellm_client_alone():
+    litellm.aclient_session = None
+
+    CompletionComponent(name="Assistant", model="gpt-3.5-turbo")
+
+    assert litellm.aclient_session is None
+
+
+async def test_shutdown_releases_client_installed_in_litellm():
+    first_client = install()
+    assert litellm.aclient_session is first_client is shared_async_client()
+
+    await shutdown()
+
+    assert litellm.aclient_session is None
+    assert install() is not first_client
+    assert not litellm.aclient_session.is_closed
@@ -0,0 +1,35 @@
+# tests/test_rate_limit.py
+
+import time
+
+import pytest
+
+from smartgraph.rate_limit import MODEL_LIMITS, AsyncTokenBucket, limiter_for_model
+
+
+async def test_token_bucket_allows_burst_then_throttles():
+    limiter = AsyncTokenBucket(rate_per_sec=20, burst=2)
+
+    start = time.monotonic()
+    for _ in range(4):
+        async with limiter:
+            pass
+    elapsed = time.monotonic() - start
+
+    # Two tokens are available immediately, the other two refill at 20/s
+    assert 0.08 <= elapsed < 0.5
+
+
+def test_token_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        AsyncTokenBucket(rate_per_sec=0)
+
+
+def test_limiter_for_model(monkeypatch):
+    monkeypatch.setitem(MODEL_LIMITS, "test-model", 5.0)
+
+    limiter = limiter_for_model("test-model")
+
+    assert limiter is limiter_for_model("test-model")
+    assert limiter.rate_per_sec == 5.0
+    assert limiter_for_model("unconfigured-model") is None
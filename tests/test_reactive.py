@@ -1,7 +1,6 @@
 # tests/test_reactive.py
 
 import pytest
-from reactivex import Observable
 from reactivex import operators as ops
 from reactivex.subject import BehaviorSubject
 from reactivex.testing import ReactiveTest, TestScheduler
@@ -12,9 +11,14 @@ on_completed = ReactiveTest.on_completed
 on_error = ReactiveTest.on_error
 
 
-def test_behavior_subject():
+@pytest.fixture
+def scheduler():
+    # Virtual time only moves forward, so each test needs a scheduler whose clock starts at 0
+    return TestScheduler()
+
+
+def test_behavior_subject(scheduler):
     """Test the BehaviorSubject, which emits its initial value to new subscribers."""
-    scheduler = TestScheduler()
 
     def create():
         return BehaviorSubject(10)
@@ -25,9 +29,8 @@ def test_behavior_subject():
     assert results.messages == [on_next(200, 10)]
 
 
-def test_map_operator():
+def test_map_operator(scheduler):
     """Test the map operator, which transforms each value emitted by the source Observable."""
-    scheduler = TestScheduler()
     source = scheduler.create_hot_observable(on_next(250, 5), on_next(350, 10), on_completed(400))
 
     def create():
@@ -42,9 +45,8 @@ def test_map_operator():
     ]
 
 
-def test_filter_operator():
+def test_filter_operator(scheduler):
     """Test the filter operator, which only emits values that satisfy a predicate."""
-    scheduler = TestScheduler()
     source = scheduler.create_hot_observable(
         on_next(250, 2), on_next(300, 5), on_next(350, 8), on_completed(400)
     )
@@ -57,9 +59,8 @@ def test_filter_operator():
     assert results.messages == [on_next(300, 5), on_next(350, 8), on_completed(400)]
 
 
-def test_merge():
+def test_merge(scheduler):
     """Test the merge operator, which combines multiple Observables into one."""
-    scheduler = TestScheduler()
     source1 = scheduler.create_hot_observable(on_next(250, 1), on_next(350, 3), on_completed(400))
     source2 = scheduler.create_hot_observable(on_next(300, 2), on_next(400, 4), on_completed(450))
 
@@ -77,9 +78,8 @@ def test_merge():
     ]
 
 
-def test_combine_latest():
+def test_combine_latest(scheduler):
     """Test the combine_latest operator, which combines the latest values from multiple Observables."""
-    scheduler = TestScheduler()
     source1 = scheduler.create_hot_observable(on_next(250, 1), on_next(350, 3), on_completed(400))
     source2 = scheduler.create_hot_observable(
         on_next(300, "a"), on_next(400, "b"), on_completed(450)
@@ -1,15 +1,18 @@
 # tests/test_reactive_component.py
 
 import pytest
-from reactivex import operators as ops
-from reactivex.testing import ReactiveTest, TestScheduler
 
 from smartgraph.core import ReactiveComponent
 
-# Convenience aliases for ReactiveTest methods
-on_next = ReactiveTest.on_next
-on_completed = ReactiveTest.on_completed
-on_error = ReactiveTest.on_error
+
+class DoubleComponent(ReactiveComponent):
+    def process(self, input_data):
+        return input_data * 2
+
+
+class ErrorComponent(ReactiveComponent):
+    def process(self, input_data):
+        raise ValueError("Test error")
 
 
 class TestReactiveComponent:
@@ -18,54 +21,40 @@ class TestReactiveComponent:
         assert component.name == "TestComponent"
 
     def test_process_input(self):
-        scheduler = TestScheduler()
-
-        class TestComponent(ReactiveComponent):
-            def process(self, input_data):
-                return input_data * 2
-
-        component = TestComponent("DoubleComponent")
-
-        def create():
-            return component.output
+        component = DoubleComponent("DoubleComponent")
+        outputs = []
+        component.output.subscribe(outputs.append)
 
-        # Create a hot observable to simulate input
-        source = scheduler.create_hot_observable(
-            on_next(300, 5), on_next(400, 10), on_completed(500)
-        )
+        component.input.on_next(5)
+        component.input.on_next(10)
 
-        # Subscribe the source to the component's input
-        source.subscribe(component.input)
-
-        results = scheduler.start(create)
-
-        assert results.messages == [
-            on_next(300, 10),  # 5 * 2
-            on_next(400, 20),  # 10 * 2
-        ]
+        assert outputs == [10, 20]  # 5 * 2, 10 * 2
 
     def test_error_handling(self):
-        scheduler = TestScheduler()
-
-        class ErrorComponent(ReactiveComponent):
-            def process(self, input_data):
-                raise ValueError("Test error")
-
         component = ErrorComponent("ErrorComponent")
+        outputs, errors = [], []
+        component.output.subscribe(outputs.append)
+        component.error.subscribe(errors.append)
+
+        component.input.on_next("test")
 
-        def create():
-            return component.error
+        assert outputs == []
+        assert len(errors) == 1
+        assert isinstance(errors[0], ValueError)
+        assert str(errors[0]) == "Test error"
 
-        source = scheduler.create_hot_observable(on_next(300, "test"), on_completed(400))
+    def test_state_management(self):
+        component = ReactiveComponent("StateComponent")
 
-        source.subscribe(component.input)
+        state = component.create_state("counter", 0)
+        assert component.create_state("counter", 10) is state
+        assert state.value == 0
 
-        results = scheduler.start(create)
+        component.update_state("counter", 1)
+        assert component.get_state("counter").value == 1
 
-        assert len(results.messages) == 1
-        assert results.messages[0].time == 300
-        assert isinstance(results.messages[0].value.value, ValueError)
-        assert str(results.messages[0].value.value) == "Test error"
+        component.update_state("missing", 1)
+        assert component.get_state("missing") is None
 
 
 if __name__ == "__main__":
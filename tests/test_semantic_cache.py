@@ -0,0 +1,73 @@
+# tests/test_semantic_cache.py
+
+import pytest
+
+from smartgraph.semantic_cache import SemanticCache
+
+VECTORS = {
+    "weather in paris": [1.0, 0.0, 0.0],
+    "paris weather": [0.99, 0.1, 0.0],
+    "tell me a joke": [0.0, 1.0, 0.0],
+}
+
+
+async def fake_embed(text):
+    return VECTORS[text]
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(threshold=0.95, max_size=2, embed_fn=fake_embed)
+
+
+async def test_similar_query_hits(cache):
+    cache.store("scope", await cache.embed("weather in paris"), "Sunny")
+
+    assert cache.lookup("scope", await cache.embed("paris weather")) == "Sunny"
+    assert cache.lookup("scope", await cache.embed("tell me a joke")) is None
+
+
+async def test_lookup_is_scoped(cache):
+    cache.store("scope", await cache.embed("weather in paris"), "Sunny")
+
+    assert cache.lookup("other", await cache.embed("weather in paris")) is None
+
+
+async def test_evicted_scopes_are_forgotten(cache):
+    vector = await cache.embed("weather in paris")
+    for turn in range(10):
+        cache.store(("conversation", turn), vector, f"Answer {turn}")
+
+    assert len(cache._scope_ids) <= 2 * cache.max_size
+    assert cache.lookup(("conversation", 9), vector) == "Answer 9"
+    assert cache.lookup(("conversation", 0), vector) is None
+
+
+async def test_least_recently_used_entry_is_evicted(cache):
+    cache.store("scope", await cache.embed("weather in paris"), "Sunny")
+    cache.store("scope", await cache.embed("tell me a joke"), "Knock knock")
+    cache.lookup("scope", await cache.embed("weather in paris"))
+    cache.store("scope", [0.0, 0.0, 1.0], "Other")
+
+    assert len(cache) == 2
+    assert cache.lookup("scope", await cache.embed("tell me a joke")) is None
+    assert cache.lookup("scope", await cache.embed("weather in paris")) == "Sunny"
+
+
+def test_expired_entries_are_dropped():
+    cache = SemanticCache(ttl=-1, embed_fn=fake_embed)
+    cache.store("scope", [1.0, 0.0, 0.0], "Sunny")
+
+    assert cache.lookup("scope", [1.0, 0.0, 0.0]) is None
+    assert len(cache) == 0
+
+
+def test_storage_grows_up_to_max_size():
+    cache = SemanticCache(threshold=0.99, max_size=40, embed_fn=fake_embed)
+    one_hot = [[float(i == j) for j in range(50)] for i in range(50)]
+    for i in range(50):
+        cache.store("scope", one_hot[i], i)
+
+    assert len(cache) == 40
+    assert cache.lookup("scope", one_hot[49]) == 49
+    assert cache.lookup("scope", one_hot[0]) is None
@@ -0,0 +1,67 @@
+# tests/test_utils.py
+
+import asyncio
+import threading
+
+import pytest
+import reactivex
+from reactivex.subject import Subject
+
+from smartgraph.utils import iter_observable, process_observable
+
+
+async def test_iter_observable_yields_all_items():
+    items = [item async for item in iter_observable(reactivex.of(1, 2, 3))]
+
+    assert items == [1, 2, 3]
+
+
+async def test_iter_observable_raises_errors():
+    with pytest.raises(ValueError, match="boom"):
+        async for _ in iter_observable(reactivex.throw(ValueError("boom"))):
+            pass
+
+
+async def test_iter_observable_from_other_thread():
+    subject = Subject()
+
+    def emit():
+        for item in range(3):
+            subject.on_next(item)
+        subject.on_completed()
+
+    loop = asyncio.get_running_loop()
+    threading.Timer(0.01, emit).start()
+
+    async def collect():
+        return [item async for item in iter_observable(subject)]
+
+    start = loop.time()
+    assert await asyncio.wait_for(collect(), timeout=2) == [0, 1, 2]
+    # The waiting consumer is woken by the emitting thread rather than the next loop event
+    assert loop.time() - start < 1
+
+
+async def test_process_observable_returns_first_item_and_disposes():
+    subject = Subject()
+
+    def emit():
+        subject.on_next("first")
+        subject.on_next("second")
+
+    asyncio.get_running_loop().call_soon(emit)
+
+    assert await process_observable(subject) == "first"
+    assert not subject.observers
+
+
+async def test_process_observable_empty_returns_none():
+    assert await process_observable(reactivex.empty()) is None
+
+
+async def test_process_observable_from_other_thread():
+    subject = Subject()
+    threading.Timer(0.01, subject.on_next, args=("threaded",)).start()
+
+    assert await asyncio.wait_for(process_observable(subject), timeout=1) == "threaded"
+    assert not subject.observers
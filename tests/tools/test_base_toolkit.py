@@ -0,0 +1,48 @@
+from functools import cached_property
+
+from smartgraph.tools.base_toolkit import Toolkit
+
+
+class EchoToolkit(Toolkit):
+    @property
+    def name(self) -> str:
+        return "EchoToolkit"
+
+    @property
+    def description(self) -> str:
+        return "A toolkit that echoes its input."
+
+    @cached_property
+    def functions(self):
+        return {"echo": self.echo}
+
+    async def echo(self, text: str) -> str:
+        """Echo the given text."""
+        return text
+
+    echo.schema = {
+        "type": "object",
+        "properties": {"text": {"type": "string"}},
+        "required": ["text"],
+    }
+
+
+def test_default_schemas_from_functions():
+    toolkit = EchoToolkit()
+
+    assert toolkit.schemas == [
+        {
+            "type": "function",
+            "function": {
+                "name": "echo",
+                "description": "Echo the given text.",
+                "parameters": EchoToolkit.echo.schema,
+            },
+        }
+    ]
+
+
+def test_functions_are_cached_per_instance():
+    toolkit = EchoToolkit()
+    assert toolkit.functions is toolkit.functions
+    assert toolkit.functions is not EchoToolkit().functions
@@ -1,16 +1,35 @@
-from datetime import datetime, timedelta
+import asyncio
+from unittest.mock import MagicMock
 
+import duckdb
 import pytest
 
 from smartgraph.tools.duck_memory_toolkit import DuckMemoryToolkit
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def requires_fts():
+    # LOAD only: the tests never download the extension
+    try:
+        duckdb.connect().execute("LOAD fts")
+    except duckdb.Error:
+        pytest.skip("DuckDB fts extension is not installed")
+
+
+@pytest.fixture(scope="module")
 def duck_memory_toolkit():
+    # One connection and table serve the whole module; each test runs in a transaction that
+    # is rolled back afterwards, so no test sees another's rows.
     return DuckMemoryToolkit(":memory:")
 
 
-@pytest.mark.asyncio
+@pytest.fixture(autouse=True)
+def rollback_memories(duck_memory_toolkit):
+    duck_memory_toolkit.conn.execute("BEGIN TRANSACTION")
+    yield
+    duck_memory_toolkit.conn.execute("ROLLBACK")
+
+
 async def test_duck_memory_toolkit(duck_memory_toolkit):
     # Test adding and retrieving a memory
     await duck_memory_toolkit.add_memory("test_key", {"value": "test_value"})
@@ -36,33 +55,24 @@ async def test_duck_memory_toolkit(duck_memory_toolkit):
     assert result is None
 
 
-def test_memory_toolkit_schemas(duck_memory_toolkit):
-    schemas = duck_memory_toolkit.schemas
+@pytest.mark.parametrize(
+    "name, properties",
+    [
+        ("add_memory", {"key", "value"}),
+        ("get_memory", {"key"}),
+        ("search_memories", {"query"}),
+        ("delete_memory", {"key"}),
+    ],
+)
+def test_memory_toolkit_schemas(duck_memory_toolkit, name, properties):
+    schemas = {s["function"]["name"]: s for s in duck_memory_toolkit.schemas}
     assert len(schemas) == 4
 
-    # Check add_memory schema
-    add_memory_schema = next(s for s in schemas if s["function"]["name"] == "add_memory")
-    assert add_memory_schema["type"] == "function"
-    assert "key" in add_memory_schema["function"]["parameters"]["properties"]
-    assert "value" in add_memory_schema["function"]["parameters"]["properties"]
-
-    # Check get_memory schema
-    get_memory_schema = next(s for s in schemas if s["function"]["name"] == "get_memory")
-    assert get_memory_schema["type"] == "function"
-    assert "key" in get_memory_schema["function"]["parameters"]["properties"]
-
-    # Check search_memories schema
-    search_memories_schema = next(s for s in schemas if s["function"]["name"] == "search_memories")
-    assert search_memories_schema["type"] == "function"
-    assert "query" in search_memories_schema["function"]["parameters"]["properties"]
+    schema = schemas[name]
+    assert schema["type"] == "function"
+    assert properties <= schema["function"]["parameters"]["properties"].keys()
 
-    # Check delete_memory schema
-    delete_memory_schema = next(s for s in schemas if s["function"]["name"] == "delete_memory")
-    assert delete_memory_schema["type"] == "function"
-    assert "key" in delete_memory_schema["function"]["parameters"]["properties"]
 
-
-@pytest.mark.asyncio
 async def test_memory_toolkit_functions(duck_memory_toolkit):
     functions = duck_memory_toolkit.functions
     assert "add_memory" in functions
@@ -81,3 +91,125 @@ async def test_memory_toolkit_functions(duck_memory_toolkit):
     await functions["delete_memory"]("test_key")
     result = await functions["get_memory"]("test_key")
     assert result is None
+
+
+async def test_clear_memories(duck_memory_toolkit):
+    await duck_memory_toolkit.add_memory("a", 1)
+    await duck_memory_toolkit.add_memory("b", 2)
+
+    await duck_memory_toolkit.clear_memories()
+
+    assert await duck_memory_toolkit.get_memory("a") is None
+    assert await duck_memory_toolkit.search_memories("b") == []
+
+
+async def test_add_memories(duck_memory_toolkit):
+    await duck_memory_toolkit.add_memory("a", {"value": "old"})
+
+    await duck_memory_toolkit.add_memories(
+        [("a", {"value": "newer"}), ("b", [1, 2]), ("a", {"value": "new"})]
+    )
+
+    assert await duck_memory_toolkit.get_memory("a") == {"value": "new"}
+    assert await duck_memory_toolkit.get_memory("b") == [1, 2]
+    assert len(await duck_memory_toolkit.search_memories("new")) == 1
+
+
+async def test_toolkit_skips_fts_unless_requested(tmp_path):
+    assert DuckMemoryToolkit(":memory:")._fts_enabled is False
+    assert DuckMemoryToolkit(str(tmp_path / "memories.duckdb"))._fts_enabled is False
+
+    toolkit = DuckMemoryToolkit(":memory:", use_fts=True)
+    await toolkit.add_memory("greeting", {"text": "hello world"})
+
+    # Uses the FTS index when the extension is available and the LIKE scan otherwise
+    results = await toolkit.search_memories("greeting")
+    assert [result["key"] for result in results] == ["greeting"]
+
+
+async def test_fts_error_falls_back_for_one_search(duck_memory_toolkit, monkeypatch):
+    await duck_memory_toolkit.add_memory("greeting", {"text": "hello world"})
+    monkeypatch.setattr(duck_memory_toolkit, "_fts_enabled", True)
+    fts_search = MagicMock(side_effect=duckdb.IOException("index busy"))
+    monkeypatch.setattr(duck_memory_toolkit, "_fts_search", fts_search)
+
+    results = await duck_memory_toolkit.search_memories("hello")
+
+    assert [result["key"] for result in results] == ["greeting"]
+    assert duck_memory_toolkit._fts_enabled
+    await duck_memory_toolkit.search_memories("hello")
+    assert fts_search.call_count == 2
+
+
+@pytest.mark.usefixtures("requires_fts")
+async def test_fts_search_ranks_word_matches():
+    toolkit = DuckMemoryToolkit(":memory:", use_fts=True)
+    assert toolkit._fts_enabled
+    await toolkit.add_memories(
+        [
+            ("a", {"text": "the cat sat"}),
+            ("b", {"text": "cats chase cats"}),
+            ("c", {"text": "concatenate strings"}),
+        ]
+    )
+
+    results = await toolkit.search_memories("cats")
+
+    # Stemmed whole-word matches ranked by BM25; the substring match in "concatenate" is not
+    # a word match
+    assert [result["key"] for result in results] == ["b", "a"]
+    assert results[0]["value"] == {"text": "cats chase cats"}
+
+
+@pytest.mark.usefixtures("requires_fts")
+async def test_fts_search_reflects_deletes_and_updates():
+    toolkit = DuckMemoryToolkit(":memory:", use_fts=True)
+    await toolkit.add_memory("a", {"text": "red apple"})
+    await toolkit.add_memory("b", {"text": "red car"})
+    assert {result["key"] for result in await toolkit.search_memories("red")} == {"a", "b"}
+
+    await toolkit.delete_memory("a")
+    await toolkit.add_memory("b", {"text": "blue car"})
+    await toolkit.add_memory("c", {"text": "red door"})
+
+    assert [result["key"] for result in await toolkit.search_memories("red")] == ["c"]
+
+
+@pytest.mark.usefixtures("requires_fts")
+async def test_fts_index_rebuild_is_deferred():
+    toolkit = DuckMemoryToolkit(":memory:", use_fts=True)
+    await toolkit.add_memory("a", {"text": "green tea"})
+    await toolkit.search_memories("green")
+    indexed_at = toolkit._fts_indexed_at
+
+    await toolkit.add_memory("b", {"text": "green light"})
+    results = await toolkit.search_memories("green")
+
+    # The write does not trigger a rebuild; the new row is found by the LIKE fallback
+    assert toolkit._fts_indexed_at == indexed_at
+    assert [result["key"] for result in results] == ["a", "b"]
+
+    toolkit._fts_rebuild_interval = 0
+    await toolkit.search_memories("green")
+    assert toolkit._fts_indexed_at > indexed_at
+    assert not toolkit._fts_stale
+
+
+@pytest.mark.benchmark(group="duck_memory")
+def test_add_and_get_memory_benchmark(aio_benchmark, duck_memory_toolkit):
+    async def add_and_get():
+        for i in range(1000):
+            await duck_memory_toolkit.add_memory(f"key{i}", {"value": i})
+            await duck_memory_toolkit.get_memory(f"key{i}")
+
+    aio_benchmark(add_and_get)
+
+
+@pytest.mark.benchmark(group="duck_memory")
+def test_search_memories_benchmark(aio_benchmark, duck_memory_toolkit):
+    async def search():
+        for _ in range(100):
+            await duck_memory_toolkit.search_memories("value")
+
+    asyncio.run(duck_memory_toolkit.add_memories((f"key{i}", {"value": i}) for i in range(1000)))
+    aio_benchmark(search)
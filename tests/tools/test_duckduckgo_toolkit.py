@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from smartgraph.tools.duckduckgo_toolkit import DuckDuckGoToolkit
+
+
+@pytest.fixture
+def duckduckgo_toolkit(mock_duckduckgo_search):
+    toolkit = DuckDuckGoToolkit(max_results=3)
+    toolkit.ddgs = mock_duckduckgo_search
+    return toolkit
+
+
+async def test_search(duckduckgo_toolkit):
+    result = await duckduckgo_toolkit.search("python")
+    assert json.loads(result) == [{"title": "Test Result", "body": "This is a test search result."}]
+
+
+async def test_news(duckduckgo_toolkit):
+    result = await duckduckgo_toolkit.news("python")
+    assert json.loads(result) == [{"title": "Test News", "body": "This is a test news article."}]
+
+
+def test_toolkits_share_ddgs_client():
+    assert DuckDuckGoToolkit().ddgs is DuckDuckGoToolkit().ddgs
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+import pytest
+
+import smartgraph
+from smartgraph import tools
+from smartgraph.tools.duck_memory_toolkit import DuckMemoryToolkit
+
+
+def test_toolkits_resolve_lazily():
+    assert tools.DuckMemoryToolkit is DuckMemoryToolkit
+    assert smartgraph.DuckMemoryToolkit is DuckMemoryToolkit
+
+
+def test_unknown_attribute_raises():
+    with pytest.raises(AttributeError):
+        tools.NotAToolkit
+
+
+def test_import_does_not_load_toolkit_backends():
+    code = (
+        "import sys, smartgraph; "
+        "print(any(m in sys.modules for m in ('duckdb', 'tavily', 'duckduckgo_search')))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "False"